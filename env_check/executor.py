@@ -0,0 +1,153 @@
+"""
+executor.py - one way to run many small checks concurrently.
+
+TaskExecutor runs a function over items inline, in a thread pool or in a
+process pool. Items are submitted in chunks (one pool task per chunk, so
+thousands of tiny checks do not each pay the submission cost), at most
+max_in_flight chunks are queued at a time (so memory stays flat however
+many items there are), and results are yielded in input order. With
+fail_fast, the first result it flags stops submission, cancels queued
+chunks and ends the results after that one.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from .severity import Severity
+
+MODES = ("inline", "thread", "process")
+
+
+def is_critical(result: Any) -> bool:
+    """
+    True for a failed ValidationResult or an issue dict with CRITICAL
+    severity, or a list/tuple containing one.
+    """
+    if isinstance(result, (list, tuple)):
+        return any(is_critical(r) for r in result)
+    if isinstance(result, dict):
+        severity = result.get("severity")
+    else:
+        if getattr(result, "ok", False):
+            return False
+        severity = getattr(result, "severity", None)
+    if severity is None:
+        return False
+    if not isinstance(severity, Severity):
+        severity = Severity.from_name(str(severity))
+    return severity >= Severity.CRITICAL
+
+
+def _run_chunk(fn: Callable, chunk: List) -> List:
+    return [fn(item) for item in chunk]
+
+
+def _call(task: Callable) -> Any:
+    return task()
+
+
+class TaskExecutor:
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        chunksize: int = 1,
+        max_in_flight: Optional[int] = None,
+        fail_fast: Optional[Callable[[Any], bool]] = None,
+    ):
+        """
+        mode: "inline" (in the calling thread), "thread" or "process"; with
+        "process", the function and items must be picklable.
+        max_in_flight: chunks submitted but not yet consumed (default 2 per worker).
+        fail_fast: predicate on each result, e.g. is_critical.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode '{mode}' (use one of {', '.join(MODES)})")
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+        self.mode = mode
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        if mode == "process":
+            self.max_workers = max_workers or (os.cpu_count() or 1)
+        self.chunksize = chunksize
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.fail_fast = fail_fast
+        self._pool = None
+        self._entered = False
+
+    def _new_pool(self):
+        cls = ProcessPoolExecutor if self.mode == "process" else ThreadPoolExecutor
+        return cls(max_workers=self.max_workers)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self._new_pool()
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        # the pool then lives until the with block ends, shared by every map()
+        self._entered = True
+        return self
+
+    def __exit__(self, *exc):
+        self._entered = False
+        self.close()
+
+    def _chunks(self, items: Iterable) -> Iterator[List]:
+        it = iter(items)
+        while True:
+            chunk = list(islice(it, self.chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def map(self, fn: Callable, items: Iterable) -> Iterator:
+        """
+        fn(item) for every item, yielded in input order. An exception raised
+        by fn is re-raised here, and the remaining chunks are cancelled.
+        """
+        if self.mode == "inline":
+            for item in items:
+                result = fn(item)
+                yield result
+                if self.fail_fast is not None and self.fail_fast(result):
+                    return
+            return
+
+        chunks = self._chunks(items)
+        pending = deque()
+        # outside a with block, each map() owns a pool of its own, so
+        # interleaved or nested map()s never shut down each other's pool
+        owned = not self._entered
+        pool = self._new_pool() if owned else self._get_pool()
+        try:
+            while True:
+                # top up to max_in_flight; items are only pulled this far ahead
+                while len(pending) < self.max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(pool.submit(_run_chunk, fn, chunk))
+                if not pending:
+                    return
+                for result in pending.popleft().result():
+                    yield result
+                    if self.fail_fast is not None and self.fail_fast(result):
+                        return
+        finally:
+            # also reached when the caller stops iterating early
+            for fut in pending:
+                fut.cancel()
+            if owned:
+                pool.shutdown(wait=True)
+
+    def run(self, tasks: Iterable[Callable[[], Any]]) -> List:
+        """Call each task with no arguments; results in task order."""
+        return list(self.map(_call, tasks))
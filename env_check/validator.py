@@ -1,5 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
+from .executor import TaskExecutor
 from .severity import Severity
 
 # Import validator classes dynamically
@@ -46,90 +47,94 @@ class ValidatorEngine:
             "non_empty": NonEmptyValidator(),
         }
 
-    def run(self) -> List[ValidationResult]:
-        results: List[ValidationResult] = []
-        for var, rules in self.config.items():
-            # Normalize rules
-            if rules is None:
-                rules = {}
-
-            # Allow shorthand enum: VAR: [a, b, c]
-            if isinstance(rules, list):
-                rules = {"enum": rules}
-
-            # Normalize shorthand min/max into range
-            if "min" in rules or "max" in rules:
-                rules["range"] = {
-                    k: rules[k] for k in ("min", "max") if k in rules
-                }
-
-            # Hard fail on invalid rule types
-            if not isinstance(rules, dict):
-                results.append(
-                    ValidationResult(
-                        var,
-                        False,
-                        Severity.ERROR,
-                        f"Invalid rule format (expected object, got {type(rules).__name__})"
-                    )
-                )
-                continue
-
-            warnings = []
-
-            allowed_keys = {
-                "required", "type", "regex", "enum",
-                "range", "file_exists", "non_empty", "severity",
-                "min", "max"
+    def run(self, executor: Optional[TaskExecutor] = None) -> List[ValidationResult]:
+        """
+        One result per configured variable, in config order. executor runs
+        the checks in threads or processes; with fail_fast it stops at the
+        first CRITICAL result, which is then the last one returned.
+        """
+        items = list(self.config.items())
+        if executor is None:
+            return [self.check_variable(var, rules) for var, rules in items]
+        return list(executor.map(self._check_item, items))
+
+    def _check_item(self, item) -> ValidationResult:
+        return self.check_variable(*item)
+
+    def check_variable(self, var: str, rules: Any) -> ValidationResult:
+        # Normalize rules
+        if rules is None:
+            rules = {}
+
+        # Allow shorthand enum: VAR: [a, b, c]
+        if isinstance(rules, list):
+            rules = {"enum": rules}
+
+        # Normalize shorthand min/max into range
+        if "min" in rules or "max" in rules:
+            rules["range"] = {
+                k: rules[k] for k in ("min", "max") if k in rules
             }
 
-            unknown = set(rules.keys()) - allowed_keys
-            if unknown:
-                warnings.append(f"Unknown rule keys: {sorted(unknown)}")
-            # Base severity for non-required failures
-            severity = Severity.from_name(rules.get("severity")) if isinstance(rules, dict) else DEFAULT_SEVERITY
-
-            # check presence
-            val = self.env.get(var)
-            if rules.get("required", False) and (val is None or val == ""):
-                detail = "Required variable missing"
-                # Missing required vars are ALWAYS CRITICAL
-                results.append(
-                    ValidationResult(var, False, Severity.CRITICAL, detail)
-                )
-                continue
-
-            # If not present and not required, this is OK (but might have default)
-            if val is None:
-                # no further checks
-                results.append(ValidationResult(var, True, Severity.INFO, "Not set (optional)"))
-                continue
-
-            # Run validators in deterministic order
-            invalid_reasons = []
-            for key, validator in self.validators_map.items():
-                if key in rules:
-                    ok, msg = validator.validate(val, rules.get(key))
-                    if not ok:
-                        invalid_reasons.append(f"{key}: {msg}")
-
-            detail = "; ".join(invalid_reasons + warnings) if invalid_reasons else (
-                "; ".join(warnings) if warnings else f"Value: {val}"
+        # Hard fail on invalid rule types
+        if not isinstance(rules, dict):
+            return ValidationResult(
+                var,
+                False,
+                Severity.ERROR,
+                f"Invalid rule format (expected object, got {type(rules).__name__})"
             )
-            
-            final_severity = severity
-            final_ok = True
-
-            if invalid_reasons:
-                final_ok = False
-            elif warnings:
-                final_ok = False
-                final_severity = Severity.WARN # Demote to WARN if only unknown keys
-            else:
-                final_severity = Severity.INFO
-
-            results.append(ValidationResult(var, final_ok, final_severity, detail))
-        return results
+
+        warnings = []
+
+        allowed_keys = {
+            "required", "type", "regex", "enum",
+            "range", "file_exists", "non_empty", "severity",
+            "min", "max"
+        }
+
+        unknown = set(rules.keys()) - allowed_keys
+        if unknown:
+            warnings.append(f"Unknown rule keys: {sorted(unknown)}")
+        # Base severity for non-required failures
+        severity = Severity.from_name(rules.get("severity")) if isinstance(rules, dict) else DEFAULT_SEVERITY
+
+        # check presence
+        val = self.env.get(var)
+        if rules.get("required", False) and (val is None or val == ""):
+            detail = "Required variable missing"
+            # Missing required vars are ALWAYS CRITICAL
+            return ValidationResult(var, False, Severity.CRITICAL, detail)
+
+        # If not present and not required, this is OK (but might have default)
+        if val is None:
+            # no further checks
+            return ValidationResult(var, True, Severity.INFO, "Not set (optional)")
+
+        # Run validators in deterministic order
+        invalid_reasons = []
+        for key, validator in self.validators_map.items():
+            if key in rules:
+                ok, msg = validator.validate(val, rules.get(key))
+                if not ok:
+                    invalid_reasons.append(f"{key}: {msg}")
+
+        detail = "; ".join(invalid_reasons + warnings) if invalid_reasons else (
+            "; ".join(warnings) if warnings else f"Value: {val}"
+        )
+
+        final_severity = severity
+        final_ok = True
+
+        if invalid_reasons:
+            final_ok = False
+        elif warnings:
+            final_ok = False
+            final_severity = Severity.WARN # Demote to WARN if only unknown keys
+        else:
+            final_severity = Severity.INFO
+
+        return ValidationResult(var, final_ok, final_severity, detail)
 
     def summarize_exit_code(self, results: List[ValidationResult]) -> int:
         """
@@ -1,11 +1,194 @@
 # src/env_check/anomaly.py
 import json
+import math
 import os
-import statistics
+import struct
+from typing import Dict, List, Optional
 from .secret_analyzer import SecretAnalyzer
 
 CACHE_DIR = ".cache"
+# legacy single-snapshot baseline; only read to seed the rolling baseline
 ANOMALY_BASELINE = os.path.join(CACHE_DIR, "anomaly_baseline.json")
+ROLLING_BASELINE = os.path.join(CACHE_DIR, "anomaly_baseline.bin")
+
+NUMERIC_FEATURES = ("entropy", "length", "digits_fraction")
+TOKEN_TYPES = tuple(SecretAnalyzer.TOKEN_TYPES) + ("UNKNOWN",)
+# a key is only scored once it has this many runs of history
+MIN_SAMPLES = 5
+Z_THRESHOLD = 3.0
+# stddev floor per feature, so a key that never changed is not flagged for
+# a trivial change (and z stays finite)
+MIN_STD = {"entropy": 0.25, "length": 1.0, "digits_fraction": 0.05}
+# a token type seen in less than this share of past runs is flagged
+RARE_TOKEN_SHARE = 0.05
+
+ISSUE_TYPES = {"entropy": "anomaly_entropy", "length": "anomaly_length", "digits_fraction": "anomaly_digits"}
+
+# file: header, type names, then per key: key length, key, record
+_MAGIC = b"ECRB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")  # magic, version, token type count, key count
+_NAME_LEN = struct.Struct("<H")
+
+
+def _record_struct(type_count: int) -> struct.Struct:
+    # runs, (mean, M2) per numeric feature, one counter per token type
+    return struct.Struct(f"<I{2 * len(NUMERIC_FEATURES)}d{type_count}I")
+
+
+class KeyStats:
+    """Welford running mean/variance per numeric feature plus token type counts."""
+    __slots__ = ("n", "mean", "m2", "types")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = [0.0] * len(NUMERIC_FEATURES)
+        self.m2 = [0.0] * len(NUMERIC_FEATURES)
+        self.types = [0] * len(TOKEN_TYPES)
+
+    def std(self, i: int) -> float:
+        return math.sqrt(self.m2[i] / (self.n - 1)) if self.n > 1 else 0.0
+
+    def add(self, features: Dict):
+        self.n += 1
+        for i, name in enumerate(NUMERIC_FEATURES):
+            x = float(features[name])
+            delta = x - self.mean[i]
+            self.mean[i] += delta / self.n
+            self.m2[i] += delta * (x - self.mean[i])
+        if features.get("token_type") in TOKEN_TYPES:
+            self.types[TOKEN_TYPES.index(features["token_type"])] += 1
+
+
+class RollingBaseline:
+    """
+    Per-key online statistics across runs, stored in a compact binary file.
+    observe() scores a run against the history and then folds it in; the
+    cost is O(keys) however many runs have been recorded. A key flagged in
+    a run is left out of the statistics by default, so a repeated bad value
+    keeps being reported instead of soon looking normal.
+    """
+
+    def __init__(self, path: str = ROLLING_BASELINE):
+        self.path = path
+        self.stats: Dict[str, KeyStats] = {}
+        self.exists = os.path.exists(path)
+        if self.exists:
+            self._load()
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        try:
+            magic, version, type_count, key_count = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("unsupported baseline format")
+            offset = _HEADER.size
+            names = []
+            for _ in range(type_count):
+                (n,) = _NAME_LEN.unpack_from(data, offset)
+                offset += _NAME_LEN.size
+                names.append(data[offset:offset + n].decode("utf-8"))
+                offset += n
+            record = _record_struct(type_count)
+            width = len(NUMERIC_FEATURES)
+            for _ in range(key_count):
+                (n,) = _NAME_LEN.unpack_from(data, offset)
+                offset += _NAME_LEN.size
+                key = data[offset:offset + n].decode("utf-8")
+                offset += n
+                values = record.unpack_from(data, offset)
+                offset += record.size
+                ks = KeyStats()
+                ks.n = values[0]
+                ks.mean = list(values[1:1 + 2 * width:2])
+                ks.m2 = list(values[2:2 + 2 * width:2])
+                # token types are stored by name, so adding a type keeps old counts
+                for name, count in zip(names, values[1 + 2 * width:]):
+                    if name in TOKEN_TYPES:
+                        ks.types[TOKEN_TYPES.index(name)] = count
+                self.stats[key] = ks
+        except (struct.error, ValueError, UnicodeDecodeError):
+            # corrupt or foreign file: start a fresh history
+            self.stats = {}
+
+    def save(self):
+        record = _record_struct(len(TOKEN_TYPES))
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(TOKEN_TYPES), len(self.stats))]
+        for name in TOKEN_TYPES:
+            raw = name.encode("utf-8")
+            parts += [_NAME_LEN.pack(len(raw)), raw]
+        for key, ks in self.stats.items():
+            raw = key.encode("utf-8")
+            interleaved = [v for pair in zip(ks.mean, ks.m2) for v in pair]
+            parts += [_NAME_LEN.pack(len(raw)), raw, record.pack(ks.n, *interleaved, *ks.types)]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp, self.path)
+        self.exists = True
+
+    def score(self, key: str, features: Dict) -> List[Dict]:
+        """Flags for one key's features against its history (no update)."""
+        ks = self.stats.get(key)
+        if ks is None or ks.n < MIN_SAMPLES:
+            return []
+        issues = []
+        for i, name in enumerate(NUMERIC_FEATURES):
+            x = float(features[name])
+            std = max(ks.std(i), MIN_STD[name])
+            z = (x - ks.mean[i]) / std
+            if abs(z) > Z_THRESHOLD:
+                issues.append({
+                    "type": ISSUE_TYPES[name],
+                    "key": key,
+                    "z": round(z, 2),
+                    "message": f"{name} for {key} is {x:.2f}, {z:+.1f} sd from its mean "
+                               f"{ks.mean[i]:.2f} over {ks.n} runs"
+                })
+        token_type = features.get("token_type")
+        if token_type in TOKEN_TYPES:
+            share = ks.types[TOKEN_TYPES.index(token_type)] / ks.n
+            if share < RARE_TOKEN_SHARE:
+                issues.append({
+                    "type": "anomaly_token_type",
+                    "key": key,
+                    "message": f"Token type for {key} is {token_type}, seen in {share:.0%} of {ks.n} runs"
+                })
+        return issues
+
+    def observe(self, features: Dict[str, Dict], update: bool = True,
+                learn_anomalies: bool = False) -> List[Dict]:
+        """
+        Score every key, then add this run to the statistics. Keys flagged
+        in this run are not added unless learn_anomalies=True (e.g. to
+        accept a deliberate change such as a new token format).
+        """
+        issues = []
+        flagged = set()
+        for key, feat in features.items():
+            found = self.score(key, feat)
+            if found:
+                flagged.add(key)
+                issues.extend(found)
+        if update:
+            for key, feat in features.items():
+                if key in flagged and not learn_anomalies:
+                    continue
+                self.stats.setdefault(key, KeyStats()).add(feat)
+        return issues
+
+    def seed_from_snapshot(self, snapshot: Dict[str, Dict]):
+        """Start the history from a legacy anomaly_baseline.json snapshot."""
+        for key, feat in snapshot.items():
+            try:
+                self.stats.setdefault(key, KeyStats()).add(feat)
+            except (KeyError, TypeError, ValueError):
+                continue
+
 
 class SimpleAnomalyDetector:
     def __init__(self, env_vars: dict):
@@ -27,70 +210,45 @@ class SimpleAnomalyDetector:
             "digits_fraction": digits_fraction
         }
 
-    def analyze(self, persist_baseline_if_missing=True):
+    def analyze(self, persist_baseline_if_missing=True, baseline_path: Optional[str] = None):
         """
         Returns (issues, info_messages)
-        issues: list of anomaly flags
+        issues: list of anomaly flags (z-scores against the rolling baseline)
         info_messages: list of info strings (e.g., baseline created)
         """
         features = {}
         for k, v in self.env.items():
             features[k] = self._make_features(k, v)
 
-        # load baseline if exists
-        if os.path.exists(ANOMALY_BASELINE):
-            with open(ANOMALY_BASELINE, "r", encoding="utf-8") as f:
-                baseline = json.load(f)
-        else:
-            baseline = None
-
-        if baseline is None:
-            if persist_baseline_if_missing:
-                # persist current features as baseline
-                with open(ANOMALY_BASELINE, "w", encoding="utf-8") as f:
-                    json.dump(features, f, indent=2)
-                return [], ["Anomaly baseline created. No anomaly flags this run."]
-            else:
+        baseline = RollingBaseline(baseline_path or ROLLING_BASELINE)
+        info = []
+        if not baseline.exists:
+            if not persist_baseline_if_missing:
                 return [], ["No baseline found and persist disabled."]
+            if os.path.exists(ANOMALY_BASELINE):
+                try:
+                    with open(ANOMALY_BASELINE, "r", encoding="utf-8") as f:
+                        baseline.seed_from_snapshot(json.load(f))
+                    info.append("Rolling anomaly baseline seeded from the previous snapshot.")
+                except Exception:
+                    pass
+            if not baseline.stats:
+                baseline.observe(features)
+                baseline.save()
+                return [], ["Anomaly baseline created. No anomaly flags this run."]
 
-        # compare per-key features simple heuristics
-        issues = []
-        info = []
-        for k, feat in features.items():
-            if k not in baseline:
+        for k in features:
+            if k not in baseline.stats:
                 info.append(f"Key '{k}' not in baseline (new key).")
-                continue
-            b = baseline[k]
-            # check entropy drop or increase beyond reasonable delta
-            try:
-                be = float(b.get("entropy", 0.0))
-                if abs(feat["entropy"] - be) > 2.0:
-                    issues.append({
-                        "type": "anomaly_entropy",
-                        "key": k,
-                        "message": f"Entropy for {k} changed from {be:.2f} -> {feat['entropy']:.2f}"
-                    })
-            except Exception:
-                pass
-            # length change
-            try:
-                bl = int(b.get("length", 0))
-                if bl > 0 and abs(feat["length"] - bl) / bl > 0.5:
-                    issues.append({
-                        "type": "anomaly_length",
-                        "key": k,
-                        "message": f"Length for {k} changed from {bl} -> {feat['length']}"
-                    })
-            except Exception:
-                pass
-
+        issues = baseline.observe(features)
+        baseline.save()
         return issues, info
 
 
 def analyze_env_file(path):
-    from .loader import load_env_file
+    from .utils import load_env_dict
     try:
-        env_vars, _ = load_env_file(path)
+        env_vars = load_env_dict(path)
         detector = SimpleAnomalyDetector(env_vars)
         issues, info = detector.analyze()
 
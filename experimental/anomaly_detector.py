@@ -1,21 +1,30 @@
 # src/env_check/anomaly_detector.py
 
-import math
 import re
-from .drift_detection import load_env_file
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
 
+from .entropy import shannon_entropy
+from .utils import load_env_dict
 
-def shannon_entropy(value: str) -> float:
-    """Calculate Shannon entropy of a value (detect secrets/tokens)."""
-    if not value:
-        return 0.0
-    freq = {c: value.count(c) for c in set(value)}
-    entropy = -sum((count/len(value)) * math.log2(count/len(value)) for count in freq.values())
-    return entropy
+URL_RE = re.compile(r"^https?://")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# entropy gap between two files' values that counts as diverging
+DIVERGENCE = 1.5
+# float slack around the DIVERGENCE bounds; entries inside it are compared
+# with the exact abs() test
+_EPS = 1e-9
 
 
-def infer_type(key: str, value: str):
+def infer_type(key: str, value: str = None):
     """Infer the expected type of the variable."""
+    return _type_for_name(key)
+
+
+@lru_cache(maxsize=4096)
+def _type_for_name(key: str):
+    # the inferred type depends only on the name, so it is computed once per key
     if "URL" in key or "URI" in key:
         return "url"
     if "EMAIL" in key:
@@ -30,9 +39,9 @@ def infer_type(key: str, value: str):
 def type_mismatch(expected_type, value):
     """Check if the value aligns with expected type."""
     if expected_type == "url":
-        return not re.match(r"^https?://", value)
+        return not URL_RE.match(value)
     if expected_type == "email":
-        return not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", value)
+        return not EMAIL_RE.match(value)
     if expected_type == "bool":
         return value.lower() not in ("true", "false", "1", "0")
     if expected_type == "number":
@@ -40,40 +49,116 @@ def type_mismatch(expected_type, value):
     return False  # string has no mismatch
 
 
-def detect_anomalies(env_file, other_env_files=None):
-    env = load_env_file(env_file)
-    anomalies = []
+class Features(NamedTuple):
+    value: str
+    entropy: float
+    length: int
+    expected_type: str
+    mismatch: bool
 
-    # Load other env files for cross-env anomaly comparisons
-    others = []
-    if other_env_files:
-        for f in other_env_files:
-            if f != env_file:
-                others.append(load_env_file(f))
 
+def feature_table(env: Dict[str, str]) -> Dict[str, Features]:
+    """Per-key features of one env file, computed once and shared by every rule."""
+    table = {}
     for key, value in env.items():
+        expected = _type_for_name(key)
+        table[key] = Features(value, shannon_entropy(value), len(value), expected, type_mismatch(expected, value))
+    return table
+
+
+def load_tables(env_files: Iterable[str], parsed: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict[str, Features]]:
+    """
+    Feature tables for env_files. parsed maps path -> env dict from
+    utils.load_env_dict (e.g. the dict passed as run_repo_scan(parsed=...));
+    files missing from it are parsed once and added, so later callers share
+    them too.
+    """
+    parsed = {} if parsed is None else parsed
+    tables = {}
+    for f in env_files:
+        if f not in tables:
+            if f not in parsed:
+                parsed[f] = load_env_dict(f)
+            tables[f] = feature_table(parsed[f])
+    return tables
+
+
+def _anomalies(table: Dict[str, Features], entropies: Dict[str, List[float]]) -> List:
+    anomalies = []
+    for key, feat in table.items():
+        value = feat.value
 
         # RULE 1: entropy detection
-        entropy = shannon_entropy(value)
-        if entropy > 4.0:  # high entropy → probably secret
+        if feat.entropy > 4.0:  # high entropy → probably secret
             anomalies.append((key, value, "High entropy value (possible secret leakage)"))
 
         # RULE 2: length heuristics
-        if len(value) <= 1:
+        if feat.length <= 1:
             anomalies.append((key, value, "Suspiciously short value"))
-        if len(value) >= 80:
+        if feat.length >= 80:
             anomalies.append((key, value, "Suspiciously long value"))
 
         # RULE 3: type inference
-        expected = infer_type(key, value)
-        if type_mismatch(expected, value):
-            anomalies.append((key, value, f"Value does not match inferred type '{expected}'"))
-
-        # RULE 4: cross-file consistency
-        for other in others:
-            if key in other and other[key] != value:
-                # Drastic value difference detection (entropy jump)
-                if abs(shannon_entropy(other[key]) - entropy) > 1.5:
-                    anomalies.append((key, value, "Value diverges significantly across environment files"))
+        if feat.mismatch:
+            anomalies.append((key, value, f"Value does not match inferred type '{feat.expected_type}'"))
+
+        # RULE 4: cross-file consistency (entropy jump). Other files' entropies
+        # for this key are sorted, so the ones further than DIVERGENCE away
+        # are counted with bisects; an equal value has an equal entropy and
+        # is never counted.
+        others = entropies.get(key)
+        if others:
+            diverging = _count_diverging(others, feat.entropy)
+            anomalies.extend([(key, value, "Value diverges significantly across environment files")] * diverging)
 
     return anomalies
+
+
+def _count_diverging(others: List[float], entropy: float) -> int:
+    """How many of the sorted `others` satisfy abs(o - entropy) > DIVERGENCE."""
+    low, high = entropy - DIVERGENCE, entropy + DIVERGENCE
+    below = bisect_left(others, low - _EPS)
+    above = bisect_right(others, high + _EPS)
+    count = below + len(others) - above
+    # entries within _EPS of a bound get the exact test, so rounding in
+    # entropy -/+ DIVERGENCE cannot change the answer
+    for i in range(below, bisect_right(others, low + _EPS)):
+        count += abs(others[i] - entropy) > DIVERGENCE
+    for i in range(max(bisect_left(others, high - _EPS), below), above):
+        count += abs(others[i] - entropy) > DIVERGENCE
+    return count
+
+
+def _entropies_by_key(tables: Iterable[Dict[str, Features]]) -> Dict[str, List[float]]:
+    by_key = {}
+    for table in tables:
+        for key, feat in table.items():
+            by_key.setdefault(key, []).append(feat.entropy)
+    for values in by_key.values():
+        values.sort()
+    return by_key
+
+
+def detect_anomalies(env_file, other_env_files=None, parsed=None):
+    """
+    parsed: optional {path: env dict} shared with other scanners, so files
+    that were already parsed are not read again.
+    """
+    others = [f for f in (other_env_files or []) if f != env_file]
+    tables = load_tables([env_file] + others, parsed)
+    # one entry per other file, as before, even if a path is listed twice
+    return _anomalies(tables[env_file], _entropies_by_key(tables[f] for f in others))
+
+
+def detect_all_anomalies(env_files, parsed=None) -> Dict[str, List]:
+    """
+    detect_anomalies(f, env_files) for every f, in time linear in the total
+    number of keys (plus a log factor): tables are built once, and each
+    key's entropies across all files are sorted once and shared. A file's
+    own entry sits at distance 0 from itself, so it never counts as
+    diverging and need not be left out.
+    """
+    env_files = list(dict.fromkeys(env_files))
+    tables = load_tables(env_files, parsed)
+    everyone = _entropies_by_key(tables.values())
+    return {f: _anomalies(tables[f], everyone) for f in env_files}
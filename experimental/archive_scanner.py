@@ -0,0 +1,152 @@
+# src/env_check/archive_scanner.py
+"""
+archive_scanner.py - scan tar / tar.gz / zip archives and `docker save`
+images member by member without extracting them to disk.
+
+Tar archives are read in stream mode ("r|*"), so memory stays bounded no
+matter how large the image is. Members that are themselves tarballs (image
+layers, gzipped or not) are detected from their magic bytes and scanned
+recursively: from the same stream when they are too big to scan as text
+anyway, otherwise from a buffered copy, so a member that turns out not to
+be a tarball is still scanned from its first byte. Archives (or layers)
+that cannot be read are listed in "skipped".
+"""
+import io
+import os
+import tarfile
+import zipfile
+import zlib
+from typing import Dict
+
+from .secret_heuristics import scan_lines
+from .utils import BINARY_SNIFF_BYTES, is_binary_chunk, is_env_filename
+
+# members bigger than this are not scanned for secrets (layers are exempt)
+MAX_MEMBER_SIZE = 5 * 1024 * 1024
+# image -> layer -> nested tarball is as deep as real images go
+MAX_DEPTH = 3
+
+ZIP_MAGIC = b"PK\x03\x04"
+COMPRESSED_MAGICS = (
+    b"\x1f\x8b",        # gzip
+    b"BZh",             # bzip2
+    b"\xfd7zXZ\x00",    # xz
+)
+TAR_MAGIC_OFFSET = 257
+# what a corrupt or non-archive stream raises while being read as one
+ARCHIVE_ERRORS = (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError, zlib.error)
+
+
+class _HeadReplay(io.RawIOBase):
+    """Raw stream that returns already-read head bytes before the rest of fileobj."""
+
+    def __init__(self, head: bytes, fileobj):
+        self._head = head
+        self._fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        data = self._fileobj.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+
+def _looks_like_tar(head: bytes) -> bool:
+    if head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + 5] == b"ustar":
+        return True
+    return head.startswith(COMPRESSED_MAGICS)
+
+
+def _new_report() -> Dict:
+    return {"env_files": [], "findings": [], "skipped": []}
+
+
+def _scan_member(fh, name: str, label: str, size: int, report: Dict, depth: int, max_member_size: int):
+    head = fh.read(BINARY_SNIFF_BYTES)
+
+    # nested layer tarball: check before the binary test, gzip looks binary
+    if depth < MAX_DEPTH and _looks_like_tar(head):
+        if size > max_member_size:
+            # a layer: streamed, never held in memory. If it is not a
+            # tarball after all, it is too big to scan as text anyway
+            try:
+                _scan_tar_stream(io.BufferedReader(_HeadReplay(head, fh)), label, report, depth + 1, max_member_size)
+                return
+            except ARCHIVE_ERRORS:
+                pass
+        else:
+            # small enough to buffer, so a failed attempt (plain .gz, corrupt
+            # layer) does not leave the member half-read for the checks below
+            fh = io.BytesIO(head + fh.read())
+            try:
+                _scan_tar_stream(fh, label, report, depth + 1, max_member_size)
+                return
+            except ARCHIVE_ERRORS:
+                fh.seek(len(head))
+
+    if is_env_filename(os.path.basename(name)):
+        report["env_files"].append(label)
+
+    if size > max_member_size or is_binary_chunk(head):
+        report["skipped"].append(label)
+        return
+
+    text = io.TextIOWrapper(
+        io.BufferedReader(_HeadReplay(head, fh)),
+        encoding="utf-8",
+        errors="ignore",
+    )
+    report["findings"].extend(scan_lines(text, label))
+
+
+def _scan_tar_stream(fileobj, label: str, report: Dict, depth: int, max_member_size: int):
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            # stream mode still records every TarInfo; drop them to keep memory flat
+            tar.members = []
+            if not member.isfile():
+                continue
+            fh = tar.extractfile(member)
+            if fh is None:
+                continue
+            _scan_member(fh, member.name, f"{label}!{member.name}", member.size, report, depth, max_member_size)
+
+
+def _scan_zip(fileobj, label: str, report: Dict, depth: int, max_member_size: int):
+    with zipfile.ZipFile(fileobj) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            with zf.open(info) as fh:
+                _scan_member(fh, info.filename, f"{label}!{info.filename}", info.file_size, report, depth, max_member_size)
+
+
+def scan_archive(path: str, max_member_size: int = MAX_MEMBER_SIZE) -> Dict:
+    """
+    Scan a tar, tar.gz/bz2/xz or zip archive (including `docker save` output).
+    Returns {"env_files": [...], "findings": [...], "skipped": [...]} where
+    member locations are written as "archive!member" ("image.tar!<layer>!app/.env"
+    for files inside layers). A file that is not a readable archive, or is
+    truncated part-way, is listed in "skipped" (with whatever was found
+    before the damage) instead of raising.
+    """
+    report = _new_report()
+    try:
+        with open(path, "rb") as f:
+            head = f.read(len(ZIP_MAGIC))
+            f.seek(0)
+            if head == ZIP_MAGIC:
+                _scan_zip(f, path, report, 0, max_member_size)
+            else:
+                _scan_tar_stream(f, path, report, 0, max_member_size)
+    except ARCHIVE_ERRORS:
+        report["skipped"].append(path)
+    return report
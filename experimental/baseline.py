@@ -0,0 +1,180 @@
+# src/env_check/baseline.py
+"""
+baseline.py - suppress known/accepted secret findings across runs.
+
+A finding's fingerprint is a hash of (detector, file path, normalized secret),
+deliberately without the line number so unrelated edits above a fixture do
+not resurface it. The secret is the matched value the scanner extracted
+(stored on the finding as secret_hash), not the whole line, so edits
+elsewhere on the same line do not resurface it either. File paths are taken
+relative to the scan root, so a baseline must be written with the same root
+the scan filters with. The baseline file stores either the exact
+fingerprints or, for very large baselines, a Bloom filter of them.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+# 2: fingerprints hash the extracted secret; version 1 files hashed the
+# snippet and are still matched that way
+BASELINE_VERSION = 2
+# false-positive rate of the Bloom filter (a new leak hidden by the baseline)
+DEFAULT_ERROR_RATE = 1e-6
+
+
+def _normalize_path(path: str, root: Optional[str] = None) -> str:
+    if root:
+        path = os.path.relpath(path, root)
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def _normalize_secret(value: str) -> str:
+    return " ".join((value or "").split())
+
+
+def secret_hash(value: str) -> str:
+    """Hash of a normalized secret value, kept on findings instead of the value."""
+    return hashlib.sha256(_normalize_secret(value).encode("utf-8")).hexdigest()
+
+
+def fingerprint(finding: Dict, root: Optional[str] = None, legacy: bool = False) -> str:
+    """
+    Stable fingerprint for a finding (independent of line number and of
+    the rest of the line). legacy=True gives the version 1 fingerprint,
+    which hashed value_snippet.
+    """
+    hashed = None if legacy else finding.get("secret_hash")
+    if hashed is None:
+        hashed = secret_hash(finding.get("value_snippet", ""))
+    parts = [
+        finding.get("pattern") or "",
+        _normalize_path(finding.get("file") or "", root),
+        hashed,
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = DEFAULT_ERROR_RATE) -> "BloomFilter":
+        capacity = max(1, capacity)
+        num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, fp: str):
+        # double hashing on the (already uniform) sha256 fingerprint
+        digest = bytes.fromhex(fp)
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, fp: str):
+        for pos in self._positions(fp):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, fp: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fp))
+
+    def to_dict(self) -> Dict:
+        return {
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "bits": base64.b64encode(zlib.compress(bytes(self.bits))).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BloomFilter":
+        bits = bytearray(zlib.decompress(base64.b64decode(data["bits"])))
+        return cls(int(data["num_bits"]), int(data["num_hashes"]), bits)
+
+
+class Baseline:
+    def __init__(self, fingerprints: Iterable[str] = (), bloom: Optional[BloomFilter] = None,
+                 version: int = BASELINE_VERSION):
+        self.fingerprints = set(fingerprints)
+        self.bloom = bloom
+        self.version = version
+
+    def __contains__(self, fp: str) -> bool:
+        if fp in self.fingerprints:
+            return True
+        return self.bloom is not None and fp in self.bloom
+
+    def accepts(self, finding: Dict, root: Optional[str] = None) -> bool:
+        """True if the finding is in the baseline (under the old fingerprint for version 1 files)."""
+        if fingerprint(finding, root) in self:
+            return True
+        return self.version < 2 and fingerprint(finding, root, legacy=True) in self
+
+    @classmethod
+    def from_findings(cls, findings: Iterable[Dict], root: Optional[str]) -> "Baseline":
+        return cls(fingerprint(f, root) for f in findings)
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        bloom = BloomFilter.from_dict(data["bloom"]) if data.get("bloom") else None
+        return cls(data.get("fingerprints", []), bloom, int(data.get("version", 1)))
+
+    def save(self, path: str, use_bloom: bool = False, error_rate: float = DEFAULT_ERROR_RATE):
+        """
+        Write the baseline. A Bloom-backed baseline cannot list its entries,
+        so it can only be saved as a Bloom filter again, with the exact
+        fingerprints added to it.
+        """
+        if self.bloom is not None and not use_bloom:
+            raise ValueError("Baseline is stored as a Bloom filter; save it with use_bloom=True")
+        if self.bloom is not None and self.version < 2 and self.fingerprints:
+            raise ValueError("Cannot add version 2 fingerprints to a version 1 Bloom filter baseline")
+        data = {"version": self.version if self.bloom is not None else BASELINE_VERSION}
+        if use_bloom:
+            if self.bloom is not None:
+                bloom = BloomFilter(self.bloom.num_bits, self.bloom.num_hashes, bytearray(self.bloom.bits))
+            else:
+                bloom = BloomFilter.for_capacity(len(self.fingerprints), error_rate)
+            for fp in self.fingerprints:
+                bloom.add(fp)
+            data["bloom"] = bloom.to_dict()
+        else:
+            data["fingerprints"] = sorted(self.fingerprints)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+def load_baseline(baseline) -> Optional[Baseline]:
+    """Accept a Baseline, a path to a baseline file, or None."""
+    if baseline is None or isinstance(baseline, Baseline):
+        return baseline
+    return Baseline.load(baseline)
+
+
+def write_baseline(path: str, findings: Iterable[Dict], root: Optional[str], use_bloom: bool = False):
+    """
+    Accept every current finding: write them all to a baseline file. root
+    is required and must be what the scan filters with: the root passed to
+    detect_secret_leaks, or None for findings whose paths are already
+    repo-relative (git history, archives).
+    """
+    Baseline.from_findings(findings, root).save(path, use_bloom=use_bloom)
+
+
+def filter_new_findings(findings: Iterable[Dict], baseline, root: Optional[str] = None) -> List[Dict]:
+    """Drop findings whose fingerprint is in the baseline."""
+    baseline = load_baseline(baseline)
+    if baseline is None:
+        return list(findings)
+    return [f for f in findings if not baseline.accepts(f, root)]
@@ -1,46 +1,234 @@
-import json
+# src/env_check/cache.py
+"""
+cache.py - validation result cache shared by runs on the same machine.
+
+Results live in one SQLite database in WAL mode, so parallel CI jobs on a
+runner can read while another writes, and every write is an atomic
+transaction. An entry is valid only for the exact env content, schema
+content and env-check version it was computed with. Entries not used for
+max_age seconds are dropped, and the least recently used ones go first
+once max_entries or max_bytes is exceeded. Entry and byte totals are kept
+in a meta table, so no operation scans the whole cache.
+
+Files are checked by stat first: when an env or schema file's (inode, size,
+mtime_ns) equals the one stored with the entry, it is not read at all.
+Only a changed stat leads to hashing the content (BLAKE2b; this detects
+edits, it does not need to resist attacks).
+"""
 import hashlib
+import json
 import os
-from typing import Dict
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from env_check import __version__ as TOOL_VERSION
+
+CACHE_PATH = ".env-check-cache.sqlite"
+MAX_ENTRIES = 10000
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE = 30 * 24 * 3600
+# last-used times are only rewritten when older than this, so warm reads
+# from many jobs do not all turn into writes
+TOUCH_INTERVAL = 60.0
+# seconds a job waits for another job's write before giving up
+BUSY_TIMEOUT = 30.0
+# bump when the results table changes; older databases are reset
+FORMAT = 2
+# a file modified this recently may change again within the same mtime
+# tick, so its stat is not trusted (it is hashed on the next check)
+RACY_WINDOW = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    env_path TEXT NOT NULL,
+    schema_path TEXT NOT NULL,
+    env_hash TEXT,
+    env_stat TEXT,
+    schema_hash TEXT,
+    schema_stat TEXT,
+    tool_version TEXT NOT NULL,
+    issues TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (env_path, schema_path)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('entries', 0), ('bytes', 0), ('format', 0);
+"""
+
 
 def file_hash(path):
-    h = hashlib.sha256()
+    h = hashlib.blake2b(digest_size=16)
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        for chunk in iter(lambda: f.read(65536), b""):
             h.update(chunk)
     return h.hexdigest()
 
+
+def _stat_key(path) -> Optional[str]:
+    """"inode:size:mtime_ns" of path, None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if time.time() - st.st_mtime < RACY_WINDOW:
+        return "racy"
+    return f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
 class ResultCache:
-    def __init__(self, cache_path=".env-check-cache.json"):
+    def __init__(self, cache_path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES,
+                 max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE):
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         self.cache_path = cache_path
-        self.data = {}
-        if os.path.exists(self.cache_path):
-            try:
-                with open(self.cache_path, "r", encoding="utf-8") as f:
-                    self.data = json.load(f)
-            except Exception:
-                self.data = {}
-
-    def make_key(self, env_path, schema_path):
-        # composite key
-        k = f"{env_path}|{schema_path}"
-        return hashlib.sha256(k.encode()).hexdigest()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # path -> (stat key, hash) of files hashed by this instance, so set()
+        # after a missed get() does not hash the same file again
+        self._hashes: Dict[str, tuple] = {}
+        # autocommit; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(cache_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+            if self.stats()["format"] != FORMAT:
+                self.conn.execute("DROP TABLE results")
+                for statement in SCHEMA.split(";")[:2]:
+                    self.conn.execute(statement)
+                self.conn.execute("UPDATE meta SET value = 0 WHERE name IN ('entries', 'bytes')")
+                self.conn.execute("UPDATE meta SET value = ? WHERE name = 'format'", (FORMAT,))
+            self._evict(time.time())
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent jobs
+        # wait on the busy timeout instead of failing half-way through
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _hash(self, path, stat_key):
+        if stat_key is None:
+            return None
+        known = self._hashes.get(path)
+        if known is not None and known[0] == stat_key and stat_key != "racy":
+            return known[1]
+        try:
+            digest = file_hash(path)
+        except OSError:
+            return None
+        self._hashes[path] = (stat_key, digest)
+        return digest
+
+    def _unchanged(self, path, stat_key, cached_stat, cached_hash):
+        """True if path still has the cached content; hashes only when the stat moved."""
+        if stat_key is None or cached_hash is None:
+            return stat_key is None and cached_hash is None
+        if stat_key != "racy" and stat_key == cached_stat:
+            return True
+        return self._hash(path, stat_key) == cached_hash
 
     def get(self, env_path, schema_path):
-        key = self.make_key(env_path, schema_path)
-        env_h = file_hash(env_path) if os.path.exists(env_path) else None
-        entry = self.data.get(key)
-        if entry and entry.get("env_hash") == env_h:
-            return entry.get("issues", []), entry.get("meta", {})
-        return None, None
+        row = self.conn.execute(
+            "SELECT env_hash, env_stat, schema_hash, schema_stat, tool_version, issues, meta, used "
+            "FROM results WHERE env_path = ? AND schema_path = ?",
+            (env_path, schema_path),
+        ).fetchone()
+        if row is None:
+            return None, None
+        env_h, env_stat, schema_h, schema_stat, version, issues, meta, used = row
+        if version != TOOL_VERSION:
+            return None, None
+        env_now, schema_now = _stat_key(env_path), _stat_key(schema_path)
+        if not (self._unchanged(env_path, env_now, env_stat, env_h)
+                and self._unchanged(schema_path, schema_now, schema_stat, schema_h)):
+            return None, None
+        now = time.time()
+        if now - used >= TOUCH_INTERVAL or env_now != env_stat or schema_now != schema_stat:
+            # content matched under a new stat (e.g. touched or re-checked
+            # out): record the stat so the next check skips hashing
+            self.conn.execute(
+                "UPDATE results SET used = ?, env_stat = ?, schema_stat = ? "
+                "WHERE env_path = ? AND schema_path = ?",
+                (now, env_now, schema_now, env_path, schema_path),
+            )
+        return json.loads(issues), json.loads(meta)
 
     def set(self, env_path, schema_path, issues, meta=None):
-        key = self.make_key(env_path, schema_path)
-        env_h = file_hash(env_path) if os.path.exists(env_path) else None
-        self.data[key] = {
-            "env_hash": env_h,
-            "issues": issues,
-            "meta": meta or {}
-        }
-        with open(self.cache_path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
+        issues_json = json.dumps(issues, separators=(",", ":"))
+        meta_json = json.dumps(meta or {}, separators=(",", ":"))
+        size = len(issues_json) + len(meta_json)
+        env_stat, schema_stat = _stat_key(env_path), _stat_key(schema_path)
+        env_h = self._hash(env_path, env_stat)
+        schema_h = self._hash(schema_path, schema_stat)
+        now = time.time()
+        with self._transaction():
+            old = self.conn.execute(
+                "SELECT size FROM results WHERE env_path = ? AND schema_path = ?",
+                (env_path, schema_path),
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (env_path, schema_path, env_hash, env_stat, "
+                "schema_hash, schema_stat, tool_version, issues, meta, size, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (env_path, schema_path, env_h, env_stat, schema_h, schema_stat,
+                 TOOL_VERSION, issues_json, meta_json, size, now),
+            )
+            if old is None:
+                self._bump(1, size)
+            else:
+                self._bump(0, size - old[0])
+            self._evict(now)
+
+    def stats(self) -> Dict[str, int]:
+        """{"entries", "bytes"} currently held (plus the table "format")."""
+        return dict(self.conn.execute("SELECT name, value FROM meta"))
+
+    def _bump(self, entries: int, size: int):
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE name = 'entries'", (entries,))
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (size,))
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until within limits."""
+        self._delete("SELECT rowid, size FROM results WHERE used < ?", (now - self.max_age,))
+        stats = self.stats()
+        while stats["entries"] > self.max_entries or stats["bytes"] > self.max_bytes:
+            # oldest first, a batch at a time through the used index
+            excess = max(stats["entries"] - self.max_entries, 1)
+            if not self._delete("SELECT rowid, size FROM results ORDER BY used LIMIT ?", (min(excess, 500),)):
+                break
+            stats = self.stats()
+
+    def _delete(self, query: str, params) -> int:
+        victims = self.conn.execute(query, params).fetchall()
+        if victims:
+            self.conn.executemany("DELETE FROM results WHERE rowid = ?", ((r[0],) for r in victims))
+            self._bump(-len(victims), -sum(r[1] for r in victims))
+        return len(victims)
+
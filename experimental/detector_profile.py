@@ -0,0 +1,136 @@
+# src/env_check/detector_profile.py
+"""
+detector_profile.py - per-detector cost and match statistics for the scanner.
+
+For every detector (each SECRET_PATTERNS regex, the sliding-window entropy
+pass and the token heuristics) and every file kind, the profile records:
+  seconds     time spent in the detector
+  lines       lines it evaluated
+  candidates  raw matches it produced
+  hits        findings still reported after baseline suppression and dedup
+"""
+import json
+import os
+from typing import Dict, Iterable, List
+
+from .patterns import SECRET_PATTERNS
+
+WINDOW_DETECTOR = "high_entropy_window"
+TOKEN_DETECTOR = "token_heuristics"
+
+# detectors flagged as regressed when ns/line grows by this factor...
+REGRESSION_FACTOR = 1.5
+# ...and the absolute cost is above this (ignore noise on trivial detectors)
+REGRESSION_MIN_NS_PER_LINE = 200.0
+
+
+def file_kind(path: str) -> str:
+    """Bucket used for per-extension stats (.env files share one bucket)."""
+    name = os.path.basename(path).lower()
+    if name.startswith(".env"):
+        return ".env"
+    return os.path.splitext(name)[1] or name
+
+
+def detector_for(pattern_name: str) -> str:
+    """Map a finding's pattern back to the detector that produced it."""
+    if pattern_name in SECRET_PATTERNS or pattern_name == WINDOW_DETECTOR:
+        return pattern_name
+    return TOKEN_DETECTOR
+
+
+def _empty():
+    return {"seconds": 0.0, "lines": 0, "candidates": 0, "hits": 0}
+
+
+def _ns_per_line(row: Dict) -> float:
+    return row["seconds"] * 1e9 / row["lines"] if row["lines"] else 0.0
+
+
+class DetectorProfile:
+    def __init__(self):
+        # (detector, file_kind) -> counters
+        self.stats: Dict[tuple, Dict] = {}
+
+    def add_file(self, path: str, file_stats: Dict[str, List]):
+        """Merge per-file tallies {detector: [seconds, lines, candidates]}."""
+        kind = file_kind(path)
+        for detector, (seconds, lines, candidates) in file_stats.items():
+            row = self.stats.setdefault((detector, kind), _empty())
+            row["seconds"] += seconds
+            row["lines"] += lines
+            row["candidates"] += candidates
+
+    def count_hits(self, findings: Iterable[Dict]):
+        """Attribute the final (reported) findings to their detectors."""
+        for f in findings:
+            key = (detector_for(f.get("pattern")), file_kind(f.get("file") or ""))
+            self.stats.setdefault(key, _empty())["hits"] += 1
+
+    def _rollup(self, index: int) -> Dict[str, Dict]:
+        out = {}
+        for key, row in self.stats.items():
+            agg = out.setdefault(key[index], _empty())
+            for field in ("seconds", "lines", "candidates", "hits"):
+                agg[field] += row[field]
+        for row in out.values():
+            row["ns_per_line"] = round(_ns_per_line(row), 1)
+        return out
+
+    def by_detector(self) -> Dict[str, Dict]:
+        return self._rollup(0)
+
+    def by_extension(self) -> Dict[str, Dict]:
+        return self._rollup(1)
+
+    def ranked(self) -> List[tuple]:
+        """(detector, stats) sorted by total time, most expensive first."""
+        return sorted(self.by_detector().items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+
+    def format_table(self) -> str:
+        rows = self.ranked()
+        total = sum(r["seconds"] for _, r in rows) or 1.0
+        lines = [f"{'DETECTOR':24} {'TIME(ms)':>9} {'SHARE':>6} {'NS/LINE':>9} {'LINES':>9} {'CANDIDATES':>10} {'HITS':>6}"]
+        for name, r in rows:
+            lines.append(
+                f"{name:24} {r['seconds'] * 1000:9.2f} {r['seconds'] / total:6.1%} {r['ns_per_line']:9.1f} "
+                f"{r['lines']:9d} {r['candidates']:10d} {r['hits']:6d}"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            "detectors": self.by_detector(),
+            "by_extension": self.by_extension(),
+            "by_detector_extension": {
+                f"{detector}|{kind}": dict(row, ns_per_line=round(_ns_per_line(row), 1))
+                for (detector, kind), row in sorted(self.stats.items())
+            },
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+
+def find_regressions(previous: Dict, current: Dict, factor: float = REGRESSION_FACTOR) -> List[Dict]:
+    """
+    Compare two profile JSON dicts (DetectorProfile.to_dict()) and return the
+    detectors whose per-line cost grew by more than `factor`. Per-line cost is
+    used so a bigger checkout alone does not look like a regression.
+    """
+    regressions = []
+    before = previous.get("detectors", {})
+    for name, row in current.get("detectors", {}).items():
+        old = before.get(name)
+        if not old or not old.get("ns_per_line"):
+            continue
+        new_cost = row.get("ns_per_line", 0.0)
+        if new_cost >= REGRESSION_MIN_NS_PER_LINE and new_cost > old["ns_per_line"] * factor:
+            regressions.append({
+                "detector": name,
+                "previous_ns_per_line": old["ns_per_line"],
+                "current_ns_per_line": new_cost,
+                "message": f"Detector {name} cost rose from {old['ns_per_line']:.0f} to {new_cost:.0f} ns/line",
+            })
+    return regressions
@@ -1,17 +1,9 @@
+from .utils import load_env_dict
+
 
 def load_env_file(path):
     """Load any .env file into a dict."""
-    env = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            env[key.strip()] = value.strip()
-    return env
+    return load_env_dict(path)
 
 
 def compare_env_files(file1, file2):
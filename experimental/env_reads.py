@@ -0,0 +1,248 @@
+# src/env_check/env_reads.py
+"""
+env_reads.py - find the environment variables source code actually reads.
+
+Call sites are pulled out with one regex pass per language instead of a
+parser:
+  Python   os.environ["X"], os.environ.get("X"), os.getenv("X")
+  JS/TS    process.env.X, process.env["X"], const { X, Y } = process.env
+  Go       os.Getenv("X"), os.LookupEnv("X")
+  Ruby     ENV["X"], ENV.fetch("X")
+  Java     System.getenv("X")
+Only literal names are extracted (os.environ[name] is not). Matches on
+line-comment lines and inside /* */ blocks are ignored. Results are cached per content hash, so a
+PR run only extracts from files whose content changed.
+"""
+import hashlib
+import json
+import os
+import re
+from functools import partial
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from env_check.executor import TaskExecutor
+from .utils import BINARY_SNIFF_BYTES, is_binary_chunk
+
+CACHE_PATH = os.path.join(".cache", "env_reads.json")
+# bump when the patterns change so cached extractions are discarded
+EXTRACTOR_VERSION = 2
+FILES_PER_TASK = 64
+
+_NAME = r"([A-Za-z_][A-Za-z0-9_]*)"
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+    ".rb": "ruby",
+    ".java": "java",
+}
+
+# each pattern starts with a literal so the regex engine can jump between
+# occurrences; the leading word boundary is checked in extract_env_reads
+READ_PATTERNS = {
+    "python": [
+        re.compile(r"""environ\s*(?:\[\s*|\.get\(\s*)(['"])""" + _NAME + r"\1"),
+        re.compile(r"""getenv\(\s*(['"])""" + _NAME + r"\1"),
+    ],
+    "js": [
+        re.compile(r"process\.env\.([A-Za-z_$][\w$]*)"),
+        re.compile(r"""process\.env\[\s*(['"`])""" + _NAME + r"\1\s*\]"),
+    ],
+    "go": [
+        re.compile(r'os\.(?:Getenv|LookupEnv)\(\s*"' + _NAME + '"'),
+    ],
+    "ruby": [
+        re.compile(r"""ENV(?:\[\s*|\.fetch\(\s*)(['"])""" + _NAME + r"\1"),
+    ],
+    "java": [
+        re.compile(r'System\.getenv\(\s*"' + _NAME + '"'),
+    ],
+}
+
+# const { A, B: alias, C = "x" } = process.env
+JS_DESTRUCTURE = re.compile(r"\{([^{}]*)\}\s*=\s*process\.env\b")
+JS_DESTRUCTURE_NAME = re.compile(r"^\s*([A-Za-z_$][\w$]*)")
+
+# line comments; a read on a line starting with one is not reported
+COMMENT_PREFIXES = {
+    "python": ("#",),
+    "ruby": ("#",),
+    "js": ("//",),
+    "go": ("//",),
+    "java": ("//",),
+}
+# /* ... */ blocks (an unterminated one runs to the end of the text); reads
+# inside are not reported. A line starting with "*" is only a comment in
+# here: outside a block it is code such as `*p = os.Getenv("X")`
+BLOCK_COMMENT = re.compile(r"/\*.*?(?:\*/|\Z)", re.S)
+BLOCK_COMMENT_LANGUAGES = frozenset(("js", "go", "java"))
+
+
+def language_for(path: str) -> Optional[str]:
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def extract_env_reads(text: str, language: str) -> List[Tuple[str, int]]:
+    """(variable name, line number) for every env read in `text`, in order."""
+    patterns = READ_PATTERNS.get(language)
+    if not patterns:
+        return []
+    hits = []
+    for pat in patterns:
+        for m in pat.finditer(text):
+            pos = m.start()
+            if pos and (text[pos - 1].isalnum() or text[pos - 1] == "_"):
+                continue
+            hits.append((pos, m.group(m.lastindex)))
+    if language == "js":
+        for m in JS_DESTRUCTURE.finditer(text):
+            for part in m.group(1).split(","):
+                # "...rest" does not match, so it is skipped
+                name = JS_DESTRUCTURE_NAME.match(part)
+                if name:
+                    hits.append((m.start(), name.group(1)))
+    if not hits:
+        return []
+
+    prefixes = COMMENT_PREFIXES[language]
+    blocks = BLOCK_COMMENT.finditer(text) if language in BLOCK_COMMENT_LANGUAGES and "/*" in text else iter(())
+    block = next(blocks, None)
+    reads = []
+    line, last = 1, 0
+    for pos, name in sorted(hits):
+        line += text.count("\n", last, pos)
+        last = pos
+        # hits are in order, so the blocks are walked once
+        while block is not None and block.end() <= pos:
+            block = next(blocks, None)
+        if block is not None and block.start() <= pos:
+            continue
+        start = text.rfind("\n", 0, pos) + 1
+        if text[start:pos].lstrip().startswith(prefixes):
+            continue
+        reads.append((name, line))
+    return reads
+
+
+def _file_reads(path: str, cached: FrozenSet[str] = frozenset()):
+    """
+    (content hash, reads) from one read of the file. reads is None when the
+    hash is already cached, [] for binary/unsupported files; the hash is
+    None if the file cannot be read.
+    """
+    language = language_for(path)
+    if language is None:
+        return None, []
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, []
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest in cached:
+        return digest, None
+    if is_binary_chunk(data[:BINARY_SNIFF_BYTES]):
+        return digest, []
+    return digest, extract_env_reads(data.decode("utf-8", errors="ignore"), language)
+
+
+class EnvReadCache:
+    """content hash -> [[name, line], ...], stored as JSON."""
+
+    def __init__(self, path: Optional[str] = CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, List] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == EXTRACTOR_VERSION:
+                    self.entries = data.get("entries", {})
+            except Exception:
+                self.entries = {}
+
+    def save(self, keep: Optional[Iterable[str]] = None):
+        """Write the cache; keep limits it to the hashes seen this run."""
+        if not self.path:
+            return
+        if keep is not None:
+            keep = set(keep)
+            self.entries = {h: v for h, v in self.entries.items() if h in keep}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": EXTRACTOR_VERSION, "entries": self.entries}, f)
+        os.replace(tmp, self.path)
+
+
+def collect_env_reads(
+    paths: Iterable[str],
+    cache_path: Optional[str] = CACHE_PATH,
+    workers: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """
+    {variable: ["file:line", ...]} over the supported source files in paths.
+    Files whose content hash is cached are read and hashed but not
+    re-extracted. workers > 1 extracts in a process pool.
+    """
+    paths = sorted(p for p in set(paths) if language_for(p))
+    cache = EnvReadCache(cache_path)
+    scan = partial(_file_reads, cached=frozenset(cache.entries))
+    if workers and workers > 1 and len(paths) > FILES_PER_TASK:
+        results = list(TaskExecutor("process", max_workers=workers, chunksize=FILES_PER_TASK).map(scan, paths))
+    else:
+        results = map(scan, paths)
+
+    reads: Dict[str, List[str]] = {}
+    seen = set()
+    extracted = 0
+    for path, (digest, found) in zip(paths, results):
+        if digest is None:
+            continue
+        seen.add(digest)
+        if found is None:
+            found = cache.entries[digest]
+        else:
+            cache.entries[digest] = [list(r) for r in found]
+            extracted += 1
+        for name, line in found:
+            reads.setdefault(name, []).append(f"{path}:{line}")
+    if extracted or len(seen) != len(cache.entries):
+        cache.save(keep=seen)
+    return reads
+
+
+def schema_keys(schema: Dict) -> set:
+    """Keys a schema declares: required/patterns/secret sections, else its top-level keys."""
+    sections = ("required", "patterns", "secret")
+    if any(s in schema for s in sections):
+        keys = set()
+        for s in sections:
+            keys |= set(schema.get(s) or [])
+        return keys
+    return set(schema)
+
+
+def find_unschema_reads(
+    paths: Iterable[str],
+    schema: Dict,
+    cache_path: Optional[str] = CACHE_PATH,
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """Issues for variables the code reads that the schema does not declare."""
+    declared = schema_keys(schema)
+    issues = []
+    for name, locations in sorted(collect_env_reads(paths, cache_path, workers).items()):
+        if name in declared:
+            continue
+        issues.append({
+            "type": "env_read_not_in_schema",
+            "severity": "warning",
+            "key": name,
+            "locations": locations,
+            "message": f"'{name}' is read by the code ({locations[0]}) but not declared in the schema."
+        })
+    return issues
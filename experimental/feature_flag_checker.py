@@ -5,7 +5,8 @@ def is_feature_flag(key):
 def check_flag_coverage(env_keys, usages_map):
     """
     env_keys: iterable of keys
-    usages_map: dict from key -> list of files (from repo_usage_checker)
+    usages_map: dict from key -> list of files (from repo_usage_checker, or
+    UsageIndex.usages() to answer from the persistent index)
     returns list of issues (warnings) if flags aren't referenced properly or conflict among envs.
     """
     issues = []
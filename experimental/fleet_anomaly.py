@@ -0,0 +1,146 @@
+# src/env_check/fleet_anomaly.py
+"""
+fleet_anomaly.py - vectorized anomaly detection across many hosts.
+
+Every (host, key) value of a fleet is turned into features held in
+host x key NumPy matrices: length, entropy, digit fraction, and the numeric
+value for integer-valued settings. Features are computed once per distinct
+value (fleets repeat most values across hosts) and scattered into the
+matrices. Each key is then compared with the fleet as a whole using robust
+z-scores (median and MAD, so the outliers being looked for do not drag the
+reference along), and all outliers come out of one boolean mask.
+"""
+from typing import Dict, List
+
+from .entropy import batch_entropy
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Iglewicz & Hoaglin: modified z-scores above 3.5 are potential outliers
+Z_THRESHOLD = 3.5
+# keys present on fewer hosts than this have no meaningful population
+MIN_HOSTS = 5
+# longest digit string treated as a number (larger ones are IDs, not settings)
+MAX_NUMERIC_DIGITS = 15
+FEATURES = ("value", "length", "entropy", "digits_fraction")
+# smallest absolute difference from the fleet median worth reporting, so
+# e.g. the natural entropy jitter of random tokens is not flagged
+MIN_DEVIATION = {"value": 0.0, "length": 2.0, "entropy": 1.0, "digits_fraction": 0.2}
+
+
+def _digit_counts(values: List[str]):
+    """ASCII digits per value from one pass over all values' UTF-8 bytes."""
+    joined = "\0".join(values)
+    if joined.count("\0") != len(values) - 1:
+        # a value contains NUL, so it cannot serve as the separator
+        return np.fromiter((sum(c.isdigit() for c in v) for v in values), dtype=np.float64, count=len(values))
+    # UTF-8 continuation bytes are >= 0x80, so byte-level digits are exact
+    buf = np.frombuffer(joined.encode("utf-8"), dtype=np.uint8)
+    is_digit = ((buf >= 0x30) & (buf <= 0x39)).astype(np.int64)
+    ends = np.append(np.flatnonzero(buf == 0), buf.size)
+    totals = np.concatenate(([0], np.cumsum(is_digit)))[ends]
+    return np.diff(totals, prepend=0).astype(np.float64)
+
+
+def _robust_z(matrix):
+    """
+    Per-column modified z-scores and medians. NaN cells (missing values)
+    stay NaN; columns with fewer than MIN_HOSTS values score 0.
+    """
+    z = np.zeros_like(matrix)
+    median = np.full(matrix.shape[1], np.nan)
+    valid = np.sum(~np.isnan(matrix), axis=0) >= MIN_HOSTS
+    if valid.any():
+        sub = matrix[:, valid]
+        med = np.nanmedian(sub, axis=0)
+        deviation = np.abs(sub - med)
+        mad = np.nanmedian(deviation, axis=0)
+        # MAD is 0 when most hosts agree exactly (e.g. DB_POOL_SIZE=10 almost
+        # everywhere); fall back to the mean absolute deviation, which the
+        # disagreeing hosts make non-zero
+        scale = np.where(mad > 0, mad / 0.6745, np.nanmean(deviation, axis=0) * 1.2533)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z[:, valid] = np.where(scale > 0, (sub - med) / scale, 0.0)
+        median[valid] = med
+    z[np.isnan(matrix)] = np.nan
+    return z, median
+
+
+def fleet_features(fleet: Dict[str, Dict[str, str]]):
+    """
+    (hosts, keys, {feature: hosts x keys float matrix}); missing values are
+    NaN, and "value" is NaN for non-integer values.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy not available. pip install numpy")
+    hosts = sorted(fleet)
+    keys = sorted({k for env in fleet.values() for k in env})
+    col = {k: j for j, k in enumerate(keys)}
+
+    sizes = [len(fleet[h]) for h in hosts]
+    rows = np.repeat(np.arange(len(hosts), dtype=np.int64), sizes)
+    cols, raw = [], []
+    for host in hosts:
+        env = fleet[host]
+        cols.extend(map(col.__getitem__, env))
+        raw.extend(env.values())
+    cols = np.asarray(cols, dtype=np.int64)
+    # features are computed per distinct value, then indexed per cell
+    distinct = {}
+    codes = np.fromiter((distinct.setdefault(v, len(distinct)) for v in raw), dtype=np.int64, count=len(raw))
+    values = ["" if v is None else str(v) for v in distinct]
+
+    lengths = np.fromiter(map(len, values), dtype=np.float64, count=len(values))
+    digits = _digit_counts(values) if values else np.zeros(0)
+    numeric = np.flatnonzero((digits == lengths) & (lengths > 0) & (lengths <= MAX_NUMERIC_DIGITS))
+    number = np.full(len(values), np.nan)
+    if numeric.size:
+        number[numeric] = np.array([values[i] for i in numeric], dtype=np.float64)
+
+    per_value = {
+        "value": number,
+        "length": lengths,
+        "entropy": np.asarray(batch_entropy(values), dtype=np.float64),
+        "digits_fraction": digits / np.maximum(lengths, 1.0),
+    }
+    matrices = {}
+    for name, column in per_value.items():
+        m = np.full((len(hosts), len(keys)), np.nan)
+        m[rows, cols] = column[codes]
+        matrices[name] = m
+    return hosts, keys, matrices
+
+
+def detect_fleet_anomalies(fleet: Dict[str, Dict[str, str]], threshold: float = Z_THRESHOLD) -> List[Dict]:
+    """
+    fleet: {host: {key: value}}. Returns one issue per (host, key, feature)
+    whose robust z-score against the other hosts exceeds `threshold`.
+    """
+    hosts, keys, matrices = fleet_features(fleet)
+    issues = []
+    for feature in FEATURES:
+        matrix = matrices[feature]
+        z, median = _robust_z(matrix)
+        with np.errstate(invalid="ignore"):
+            flagged = (np.abs(z) > threshold) & (np.abs(matrix - median) >= MIN_DEVIATION[feature])
+        for i, j in zip(*np.nonzero(flagged)):
+            value = fleet[hosts[i]][keys[j]]
+            issues.append({
+                "type": "fleet_outlier",
+                "severity": "warning",
+                "host": hosts[i],
+                "key": keys[j],
+                "feature": feature,
+                "observed": float(matrix[i, j]),
+                "fleet_median": float(median[j]),
+                "z": round(float(z[i, j]), 2),
+                "message": f"{keys[j]} on {hosts[i]} has {feature} {matrix[i, j]:g} "
+                           f"(fleet median {median[j]:g}, z={z[i, j]:+.1f}); value {value!r}"
+            })
+    issues.sort(key=lambda x: (x["host"], x["key"], FEATURES.index(x["feature"])))
+    return issues
@@ -0,0 +1,278 @@
+# src/env_check/git_history.py
+"""
+git_history.py - scan every blob ever committed, not only the working tree.
+
+Commits are streamed oldest-first from `git log --raw -m`, and each new blob
+is read through a single long-running `git cat-file --batch` process. Merge
+commits are diffed against every parent, so content that first appears in a
+merge (a conflict resolution, an "evil merge") is scanned too. A checkpoint
+file records the last fully scanned commit so the next run only walks
+`<last>..HEAD`, and a sidecar file (<checkpoint>.blobs) records every blob
+already scanned, so a blob is scanned once across runs no matter how many
+commits or paths reference it, including when a later commit brings it back.
+"""
+import json
+import os
+import subprocess
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .secret_heuristics import scan_lines
+from .utils import BINARY_SNIFF_BYTES, is_binary_chunk
+
+CACHE_DIR = ".cache"
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "git_history_checkpoint.json")
+
+# blobs larger than this are assumed to be data/artifacts and skipped
+MAX_BLOB_SIZE = 1024 * 1024
+# persist progress every N commits so an interrupted run can resume
+CHECKPOINT_EVERY = 500
+
+SUBMODULE_MODE = "160000"
+
+
+def _git(repo: str, *args: str) -> List[str]:
+    return ["git", "-C", repo, "-c", "core.quotePath=false", *args]
+
+
+def _is_null_sha(sha: str) -> bool:
+    return set(sha) == {"0"}
+
+
+# -----------------------------------------
+# Checkpoint
+# -----------------------------------------
+
+def load_checkpoint(path: str, repo: str) -> Dict:
+    """Return the saved state for `repo`, or {} if missing/unreadable/other repo."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return {}
+    if state.get("repo") != os.path.abspath(repo):
+        return {}
+    return state
+
+
+def save_checkpoint(path: str, repo: str, last_commit: str, pending: List[Dict], blobs: int = 0):
+    """
+    Atomically write the checkpoint.
+    `pending` holds findings from commits after the previous completed run
+    that have not been returned to a caller yet, so a resumed run still
+    reports them. `blobs` is how many bytes of <path>.blobs belong to this
+    checkpoint (see append_seen_blobs).
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "repo": os.path.abspath(repo),
+            "last_commit": last_commit,
+            "pending": pending,
+            "blobs": blobs,
+        }, f)
+    os.replace(tmp, path)
+
+
+def load_seen_blobs(path: str, size: int) -> set:
+    """
+    Blob ids (raw bytes) in the first `size` bytes of <path>.blobs, one hex
+    id per line. Ids appended after the checkpoint was last written (an
+    interrupted run) are ignored, because their commits are walked again.
+    """
+    try:
+        with open(path + ".blobs", "rb") as f:
+            data = f.read(size)
+    except OSError:
+        return set()
+    return {bytes.fromhex(line.decode("ascii")) for line in data.split()}
+
+
+def append_seen_blobs(path: str, size: int, ids: List[bytes]) -> int:
+    """
+    Write `ids` to <path>.blobs after its first `size` bytes (dropping any
+    left by an interrupted run) and fsync. Returns the new size, to be saved
+    in the checkpoint afterwards.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = b"".join(key.hex().encode("ascii") + b"\n" for key in ids)
+    with open(path + ".blobs", "ab") as f:
+        f.truncate(size)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return size + len(data)
+
+
+def _commit_exists(repo: str, sha: str) -> bool:
+    proc = subprocess.run(
+        _git(repo, "cat-file", "-e", f"{sha}^{{commit}}"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return proc.returncode == 0
+
+
+# -----------------------------------------
+# Streaming git plumbing
+# -----------------------------------------
+
+def iter_commit_blobs(repo: str, since: Optional[str] = None) -> Iterator[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Yield (commit_sha, [(blob_sha, path), ...]) oldest first.
+    Only blobs added or modified by the commit are listed; deletions and
+    submodule entries are dropped. A merge is diffed against each parent
+    (-m) and its blobs are listed together.
+    """
+    rev = f"{since}..HEAD" if since else "HEAD"
+    cmd = _git(
+        repo, "log", "--reverse", "--root", "--no-renames", "--raw", "-m",
+        "--no-abbrev", "--format=commit %H", rev,
+    )
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    commit = None
+    blobs = []
+    try:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line.startswith("commit "):
+                sha = line[len("commit "):]
+                # with -m a merge is printed once per parent
+                if sha == commit:
+                    continue
+                if commit:
+                    yield commit, blobs
+                commit = sha
+                blobs = []
+            elif line.startswith(":"):
+                # :old_mode new_mode old_sha new_sha status\tpath
+                meta, _, path = line.partition("\t")
+                fields = meta[1:].split()
+                if len(fields) < 5:
+                    continue
+                new_mode, new_sha, status = fields[1], fields[3], fields[4]
+                if status == "D" or new_mode == SUBMODULE_MODE or _is_null_sha(new_sha):
+                    continue
+                blobs.append((new_sha, path))
+        if commit:
+            yield commit, blobs
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+class BlobReader:
+    """Reads blob contents through one `git cat-file --batch` process."""
+
+    def __init__(self, repo: str):
+        self.proc = subprocess.Popen(
+            _git(repo, "cat-file", "--batch"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, sha: str, max_size: int = MAX_BLOB_SIZE) -> Optional[bytes]:
+        """Return blob bytes, or None if missing, not a blob, or too large."""
+        self.proc.stdin.write(sha.encode("ascii") + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        # "<sha> missing" has no size field
+        if len(header) < 3:
+            return None
+        size = int(header[2])
+        if header[1] != b"blob" or size > max_size:
+            self._discard(size + 1)
+            return None
+        data = self.proc.stdout.read(size)
+        self.proc.stdout.read(1)  # trailing newline
+        return data
+
+    def _discard(self, n: int):
+        while n > 0:
+            chunk = self.proc.stdout.read(min(n, 65536))
+            if not chunk:
+                break
+            n -= len(chunk)
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except Exception:
+            pass
+        self.proc.stdout.close()
+        self.proc.wait()
+
+
+# -----------------------------------------
+# History scan
+# -----------------------------------------
+
+def scan_git_history(
+    repo: str = ".",
+    checkpoint_path: Optional[str] = CHECKPOINT_PATH,
+    max_blob_size: int = MAX_BLOB_SIZE,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+) -> List[Dict]:
+    """
+    Scan blobs introduced by commits after the checkpoint (or all history).
+    Findings carry the usual file/line/pattern/severity fields plus the
+    `commit` that introduced the blob and the `blob` sha.
+    Pass checkpoint_path=None to always scan the full history.
+    Blobs scanned by earlier runs (recorded with the checkpoint) are not
+    scanned or reported again.
+    """
+    state = load_checkpoint(checkpoint_path, repo) if checkpoint_path else {}
+    since = state.get("last_commit")
+    if since and not _commit_exists(repo, since):
+        # history was rewritten; start over
+        since = None
+        state = {}
+
+    findings = list(state.get("pending", []))
+    saved = state.get("blobs", 0)
+    seen = load_seen_blobs(checkpoint_path, saved) if checkpoint_path else set()
+    # blobs scanned since the checkpoint was last written
+    new_blobs = []
+    last_commit = since
+    reader = BlobReader(repo)
+    try:
+        for n, (commit, blobs) in enumerate(iter_commit_blobs(repo, since), start=1):
+            for blob, path in blobs:
+                key = bytes.fromhex(blob)
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_blobs.append(key)
+                data = reader.read(blob, max_blob_size)
+                if data is None or is_binary_chunk(data[:BINARY_SNIFF_BYTES]):
+                    continue
+                text = data.decode("utf-8", errors="ignore")
+                for f in scan_lines(text.splitlines(True), path):
+                    f["commit"] = commit
+                    f["blob"] = blob
+                    findings.append(f)
+            last_commit = commit
+            if checkpoint_path and n % checkpoint_every == 0:
+                saved = append_seen_blobs(checkpoint_path, saved, new_blobs)
+                new_blobs = []
+                save_checkpoint(checkpoint_path, repo, last_commit, findings, saved)
+    finally:
+        reader.close()
+
+    if checkpoint_path and last_commit:
+        saved = append_seen_blobs(checkpoint_path, saved, new_blobs)
+        # findings are handed to the caller now; nothing left pending
+        save_checkpoint(checkpoint_path, repo, last_commit, [], saved)
+    return findings
@@ -0,0 +1,139 @@
+# src/env_check/journal.py
+"""
+journal.py - append-only checkpoint journal for long secret scans.
+
+Each completed file is appended as one JSON line with its size, mtime and
+raw findings. A resumed scan skips files that are journaled and unchanged
+and reuses their findings. Lines are flushed as they are written and the
+file is fsynced every few seconds, so a killed or preempted scan loses at
+most the file in flight plus that window.
+"""
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+# seconds between fsyncs (each record is still flushed to the OS immediately)
+SYNC_INTERVAL = 2.0
+
+
+class ScanJournal:
+    def __init__(self, path: str, resume: bool = False, settings: Optional[Dict] = None,
+                 sync_interval: float = SYNC_INTERVAL):
+        """
+        settings: scan options that affect findings (e.g. min_severity). A
+        journal written with different settings is discarded, not resumed.
+        """
+        self.path = path
+        self.settings = settings or {}
+        self.sync_interval = sync_interval
+        self.entries: Dict[str, Dict] = {}
+
+        if resume and os.path.exists(path):
+            header, self.entries = self._load()
+            if header != self.settings:
+                self.entries = {}
+        if self.entries:
+            self._fh = open(path, "a", encoding="utf-8")
+            if not self._ends_with_newline():
+                # terminate a torn last line so the next record parses
+                self._fh.write("\n")
+        else:
+            self._fh = open(path, "w", encoding="utf-8")
+            self._write({"settings": self.settings})
+        self._last_sync = time.monotonic()
+
+    def _load(self):
+        header = None
+        entries = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # torn final line from an interrupted write
+                    continue
+                if "settings" in rec:
+                    header = rec["settings"]
+                elif "file" in rec:
+                    entries[rec["file"]] = rec
+        return header, entries
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _write(self, rec: Dict):
+        self._fh.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    def lookup(self, path: str, st: Optional[os.stat_result] = None) -> Optional[List[Dict]]:
+        """Journaled findings for path if it is unchanged since then, else None."""
+        rec = self.entries.get(path)
+        if rec is None:
+            return None
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+        if rec.get("size") != st.st_size or rec.get("mtime_ns") != st.st_mtime_ns:
+            return None
+        return rec.get("findings", [])
+
+    def record(self, path: str, findings: List[Dict], st: Optional[os.stat_result] = None):
+        rec = {"file": path, "findings": findings}
+        if st is not None:
+            rec["size"] = st.st_size
+            rec["mtime_ns"] = st.st_mtime_ns
+        self.entries[path] = rec
+        self._write(rec)
+        now = time.monotonic()
+        if now - self._last_sync >= self.sync_interval:
+            os.fsync(self._fh.fileno())
+            self._last_sync = now
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_journal(path: Optional[str], resume: bool = False, settings: Optional[Dict] = None):
+    """ScanJournal for path, or a no-op context yielding None when path is None."""
+    if not path:
+        return nullcontext(None)
+    return ScanJournal(path, resume=resume, settings=settings)
+
+
+def journaled(scan_one: Callable[[str], List[Dict]], journal: Optional[ScanJournal]) -> Callable[[str], List[Dict]]:
+    """Wrap a per-file scan so journaled unchanged files are skipped and new results recorded."""
+    if journal is None:
+        return scan_one
+
+    def run(path: str) -> List[Dict]:
+        try:
+            # stat before scanning: a file edited mid-scan is rescanned on resume
+            st = os.stat(path)
+        except OSError:
+            st = None
+        cached = journal.lookup(path, st) if st is not None else None
+        if cached is not None:
+            return cached
+        findings = scan_one(path)
+        journal.record(path, findings, st)
+        return findings
+
+    return run
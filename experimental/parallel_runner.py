@@ -1,19 +1,20 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from env_check.executor import TaskExecutor
+
+def _guarded(task):
+    try:
+        return task() or []
+    except Exception as e:
+        return [{
+            "type": "internal_error",
+            "message": f"Parallel task failed: {e}"
+        }]
 
 # tasks are callables that return list-of-issues (or [])
-def run_tasks_in_parallel(tasks, max_workers=4):
-    results = []
+def run_tasks_in_parallel(tasks, max_workers=4, mode="thread", fail_fast=None):
+    # issues come back in task order; fail_fast (e.g. executor.is_critical)
+    # stops after the first task whose issues it flags
     issues = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        future_map = {ex.submit(t): idx for idx, t in enumerate(tasks)}
-        for fut in as_completed(future_map):
-            try:
-                r = fut.result()
-                if r:
-                    issues.extend(r)
-            except Exception as e:
-                issues.append({
-                    "type": "internal_error",
-                    "message": f"Parallel task failed: {e}"
-                })
+    executor = TaskExecutor(mode=mode, max_workers=max_workers, fail_fast=fail_fast)
+    for r in executor.map(_guarded, tasks):
+        issues.extend(r)
     return issues
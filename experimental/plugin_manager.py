@@ -1,56 +1,457 @@
 """
 plugins.py - load and run custom plugins
+
+Plugins come from files (explicit paths or a plugins directory) and, when
+asked for with entry_points=True, from installed packages that declare an
+entry point in the "env_check.plugins" group, e.g. in pyproject.toml:
+
+    [project.entry-points."env_check.plugins"]
+    vault = "env_check_vault.plugin"
+
+Discovery does not execute plugin code. Each plugin's source is parsed
+for top-level literal KEYS (the variables or fnmatch globs it checks),
+EXECUTION and TIMEOUT. A plugin whose KEYS match nothing in the
+environment is never imported, and a "process" plugin is imported only
+in its child process. A plugin without KEYS always applies.
 """
+import ast
+import fnmatch
+import hashlib
+import importlib
 import importlib.util
+import multiprocessing
 import os
+import re
 import sys
+import threading
+import time
+from importlib import metadata
 from types import ModuleType
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+ENTRY_POINT_GROUP = "env_check.plugins"
+# prefix of the module names given to file plugins
+FILE_MODULE_PREFIX = "env_check_plugin_"
+
+
+def _module_name_for(path: str) -> str:
+    # stable across processes (hash() is salted per interpreter), so a
+    # process plugin or a second load finds the same sys.modules entry
+    stem = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+    digest = hashlib.blake2b(path.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{FILE_MODULE_PREFIX}{stem}_{digest}"
+
 
 def _load_module_from_path(path: str) -> ModuleType:
     path = os.path.abspath(path)
     if not os.path.exists(path):
         raise FileNotFoundError(path)
-    name = f"env_check_plugin_{abs(hash(path))}"
+    name = _module_name_for(path)
+    if name in sys.modules:
+        return sys.modules[name]
     spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None:
+        raise ImportError(f"Cannot load plugin {path}")
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
     return module
 
-def load_plugins(plugin_paths: list = None, plugins_dir: str = None):
-    modules = []
-    plugin_paths = plugin_paths or []
-    for p in plugin_paths:
-        modules.append(_load_module_from_path(p))
 
+def _static_settings(path: Optional[str]) -> Dict:
+    """Top-level literal KEYS/EXECUTION/TIMEOUT of a plugin source, read without running it."""
+    settings = {}
+    if not path or not path.endswith(".py"):
+        return settings
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return settings
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in ("KEYS", "EXECUTION", "TIMEOUT"):
+                try:
+                    settings[name] = ast.literal_eval(node.value)
+                except ValueError:
+                    # computed at import time; treated as undeclared
+                    pass
+    return settings
+
+
+# seconds a plugin may run before it is reported as plugin_timeout; a plugin
+# module can set its own TIMEOUT
+PLUGIN_TIMEOUT = 30.0
+# where a plugin runs unless its module-level EXECUTION says otherwise:
+# "thread" (for I/O-bound plugins) or "process" (CPU-bound, or plugins that
+# must not share state with the validator)
+DEFAULT_EXECUTION = "thread"
+
+
+class PluginSpec:
+    """A discovered plugin: where it comes from and what it handles, before import."""
+
+    def __init__(self, name: str, path: Optional[str] = None, module: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.module_name = module
+        settings = _static_settings(path)
+        keys = settings.get("KEYS")
+        if isinstance(keys, str):
+            keys = [keys]
+        self.keys: Optional[Tuple[str, ...]] = tuple(keys) if keys is not None else None
+        # a "process" plugin is never imported here, only in its child
+        self.execution = settings.get("EXECUTION", DEFAULT_EXECUTION)
+        self.timeout = settings.get("TIMEOUT")
+        self._module = None
+
+    def __repr__(self):
+        return f"PluginSpec({self.name!r}, keys={self.keys!r})"
+
+    def applies(self, env_vars: Optional[dict]) -> bool:
+        """True if the plugin checks any key of env_vars (or declares no KEYS)."""
+        if self.keys is None or env_vars is None:
+            return True
+        for pattern in self.keys:
+            if any(c in pattern for c in "*?["):
+                if fnmatch.filter(env_vars, pattern):
+                    return True
+            elif pattern in env_vars:
+                return True
+        return False
+
+    @property
+    def import_name(self) -> str:
+        """The module name the plugin is imported under (also in a child process)."""
+        return self.module_name if self.module_name is not None else _module_name_for(self.path)
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            if self.module_name is not None:
+                self._module = importlib.import_module(self.module_name)
+            else:
+                self._module = _load_module_from_path(self.path)
+        return self._module
+
+
+def _entry_points():
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    # Python 3.9: a dict of group -> entry points
+    return list(eps.get(ENTRY_POINT_GROUP, []))
+
+
+def _entry_point_spec(ep) -> PluginSpec:
+    # "pkg.module" or "pkg.module:attr"; the module is what gets imported
+    module = ep.value.split(":", 1)[0].strip()
+    try:
+        # locating the source imports parent packages, not the plugin itself
+        found = importlib.util.find_spec(module)
+        path = found.origin if found is not None else None
+    except (ImportError, ValueError):
+        path = None
+    return PluginSpec(ep.name, path=path, module=module)
+
+
+def discover_plugins(plugin_paths: list = None, plugins_dir: str = None,
+                     entry_points: bool = False) -> List[PluginSpec]:
+    """
+    Specs for explicit paths, then plugins_dir (sorted), then, with
+    entry_points=True, installed entry points (by name). Entry points are
+    opt-in, so installing a package never changes what an existing caller
+    runs.
+    """
+    specs = []
+    for p in plugin_paths or []:
+        if not os.path.exists(p):
+            raise FileNotFoundError(p)
+        specs.append(PluginSpec(os.path.basename(p), path=os.path.abspath(p)))
     if plugins_dir:
-        for fname in os.listdir(plugins_dir):
+        if not os.path.isdir(plugins_dir):
+            raise NotADirectoryError(plugins_dir)
+        for fname in sorted(os.listdir(plugins_dir)):
             if fname.endswith(".py"):
-                modules.append(_load_module_from_path(os.path.join(plugins_dir, fname)))
-    return modules
+                specs.append(PluginSpec(fname, path=os.path.abspath(os.path.join(plugins_dir, fname))))
+    if entry_points:
+        for ep in sorted(_entry_points(), key=lambda e: e.name):
+            specs.append(_entry_point_spec(ep))
+    return specs
+
+
+def load_plugins(plugin_paths: list = None, plugins_dir: str = None,
+                 env_vars: dict = None, entry_points: bool = False):
+    """
+    Import the plugins that apply to env_vars (all of them when env_vars is
+    None); the rest are discovered but never executed.
+    """
+    specs = discover_plugins(plugin_paths, plugins_dir, entry_points=entry_points)
+    return [spec.load() for spec in specs if spec.applies(env_vars)]
+
+
+def _plugin_name(mod) -> str:
+    if isinstance(mod, PluginSpec):
+        return mod.name
+    return getattr(mod, "__name__", "unknown")
+
+
+def _error_issue(mod, message: str) -> dict:
+    return {
+        "type": "plugin_error",
+        "message": f"Plugin {_plugin_name(mod)} {message}",
+        "severity": "warning"
+    }
 
-def run_plugins(modules: list, env_vars: dict, schema: dict):
+
+class PluginRegistry:
+    """
+    Key -> hook index for v2 plugins. A v2 plugin module defines
+    register(registry) and calls registry.on(keys, hook) for the keys or
+    globs (fnmatch, case-sensitive) it checks; hook(key, value, env_vars,
+    schema) returns a list of issues or None. dispatch() calls each hook
+    only for the keys it matches. Every plugin gets its own registry and
+    pass (see run_plugins), so exact keys are looked up in env_vars rather
+    than the environment being walked once per plugin.
     """
-    Each plugin must expose run(env_vars, schema) -> list_of_issues (or None)
+
+    def __init__(self):
+        self._exact: Dict[str, list] = {}
+        self._globs: list = []
+        self._count = 0
+        self._owner = None
+
+    def on(self, keys, hook):
+        if isinstance(keys, str):
+            keys = [keys]
+        for k in keys:
+            entry = (self._count, self._owner, hook)
+            self._count += 1
+            if any(c in k for c in "*?["):
+                self._globs.append((re.compile(fnmatch.translate(k)), entry))
+            else:
+                self._exact.setdefault(k, []).append(entry)
+        return hook
+
+    def register(self, mod):
+        """Let mod register its hooks; they are attributed to mod in dispatch()."""
+        self._owner = mod
+        try:
+            mod.register(self)
+        finally:
+            self._owner = None
+
+    def hooks_for(self, key: str) -> list:
+        """(owner, hook) pairs for key, in registration order."""
+        entries = list(self._exact.get(key, ()))
+        if self._globs:
+            entries.extend(e for pat, e in self._globs if pat.match(key))
+            entries.sort(key=lambda e: e[0])
+        # a hook registered under several matching patterns runs once
+        seen = set()
+        hooks = []
+        for _, owner, hook in entries:
+            if (id(owner), id(hook)) not in seen:
+                seen.add((id(owner), id(hook)))
+                hooks.append((owner, hook))
+        return hooks
+
+    def dispatch(self, env_vars: dict, schema: dict) -> Dict[int, list]:
+        """
+        Run the hooks over env_vars; {id(owner): issues}. With only exact
+        keys registered this costs one env_vars lookup per registered key
+        (issues follow registration order); globs need a pass over every
+        key of env_vars (issues follow env_vars order).
+        """
+        issues: Dict[int, list] = {}
+        if self._globs:
+            keys = list(env_vars)
+        else:
+            keys = [k for k in self._exact if k in env_vars]
+        for key in keys:
+            value = env_vars[key]
+            for owner, hook in self.hooks_for(key):
+                try:
+                    out = hook(key, value, env_vars, schema)
+                except Exception as e:
+                    out = [_error_issue(owner, f"hook for {key} failed: {e}")]
+                if out:
+                    issues.setdefault(id(owner), []).extend(out)
+        return issues
+
+
+def _run_hooks(mod, env_vars, schema) -> list:
+    """register() and one dispatch pass for a single v2 plugin."""
+    registry = PluginRegistry()
+    try:
+        registry.register(mod)
+    except Exception as e:
+        return [_error_issue(mod, f"register() failed: {e}")]
+    return registry.dispatch(env_vars, schema).get(id(mod), [])
+
+
+def _invoke(mod, env_vars, schema) -> list:
+    """One plugin on its own: register() hooks if it has them, else run()."""
+    if _is_v2(mod):
+        return _run_hooks(mod, env_vars, schema)
+    result = mod.run(env_vars, schema)
+    return result if isinstance(result, list) else []
+
+
+def _is_v2(mod) -> bool:
+    return callable(getattr(mod, "register", None))
+
+
+class _ThreadRun:
+    """Runs a plugin in a daemon thread, so a hung plugin never blocks exit."""
+
+    def __init__(self, mod, env_vars, schema):
+        self.mod = mod
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._target, args=(env_vars, schema),
+            name=f"plugin-{_plugin_name(mod)}", daemon=True
+        )
+        self.thread.start()
+
+    def _target(self, env_vars, schema):
+        try:
+            self.result = _invoke(self.mod, env_vars, schema)
+        except Exception as e:
+            self.error = e
+
+    def wait(self, timeout):
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return None
+        if self.error is not None:
+            return [_error_issue(self.mod, f"failed: {self.error}")]
+        return self.result if isinstance(self.result, list) else []
+
+
+def _import_plugin(name, path):
+    if name.startswith(FILE_MODULE_PREFIX):
+        return _load_module_from_path(path)
+    return importlib.import_module(name)
+
+
+def _process_target(name, path, env_vars, schema, conn):
+    try:
+        conn.send(("ok", _invoke(_import_plugin(name, path), env_vars, schema)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+class _ProcessRun:
+    """
+    Runs a plugin in a child process, which is killed on timeout. mod is
+    a loaded module or a PluginSpec; a spec is only imported in the child.
+    """
+
+    def __init__(self, mod, env_vars, schema):
+        self.mod = mod
+        if isinstance(mod, PluginSpec):
+            name, path = mod.import_name, mod.path
+        else:
+            name, path = mod.__name__, mod.__file__
+        self.conn, child_conn = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=_process_target, args=(name, path, env_vars, schema, child_conn),
+            name=f"plugin-{_plugin_name(mod)}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait(self, timeout):
+        try:
+            # read before joining: a large result would block the child's send
+            if not self.conn.poll(timeout):
+                return None
+            status, payload = self.conn.recv()
+        except EOFError:
+            self.process.join()
+            return [_error_issue(self.mod, f"exited with code {self.process.exitcode}")]
+        self.process.join()
+        if status == "error":
+            return [_error_issue(self.mod, f"failed: {payload}")]
+        return payload
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+
+
+def run_plugins(modules: list, env_vars: dict, schema: dict, timeout: float = PLUGIN_TIMEOUT):
+    """
+    Each plugin must expose register(registry) (see PluginRegistry) or
+    run(env_vars, schema) -> list_of_issues (or None)
+    modules may also hold PluginSpecs from discover_plugins(); those are
+    imported only if they apply to env_vars.
     Issue format: { "type": "...", "message": "...", "severity": "warning"/"error" }
+
+    All plugins run concurrently, each in a thread or a child process per
+    its EXECUTION attribute, and each gets `timeout` seconds (or its own
+    TIMEOUT) of wall-clock time. A plugin still running then is reported
+    as plugin_timeout; a process plugin is killed, a thread plugin is left
+    running in the background. A register() plugin dispatches its own
+    hooks in its thread or process, so a hung hook only times out its own
+    plugin; a plugin registering only exact keys costs a lookup per key,
+    not a pass over env_vars. Issues are merged in module order, so the output does
+    not depend on which plugin finishes first.
     """
-    all_issues = []
+    started = time.monotonic()
+    runs = []
     for mod in modules:
-        if hasattr(mod, "run") and callable(mod.run):
+        if isinstance(mod, PluginSpec):
+            # discovered, not yet imported: only import it if it applies
+            if not mod.applies(env_vars):
+                continue
+            if mod.execution == "process" and mod.path:
+                runs.append((mod, _ProcessRun(mod, env_vars, schema)))
+                continue
             try:
-                result = mod.run(env_vars, schema)
-                if isinstance(result, list):
-                    all_issues.extend(result)
+                mod = mod.load()
             except Exception as e:
-                all_issues.append({
-                    "type": "plugin_error",
-                    "message": f"Plugin {getattr(mod, '__name__', 'unknown')} failed: {e}",
-                    "severity": "warning"
-                })
+                runs.append((mod, _error_issue(mod, f"failed to load: {e}")))
+                continue
+        if not (_is_v2(mod) or callable(getattr(mod, "run", None))):
+            runs.append((mod, None))
+            continue
+        execution = getattr(mod, "EXECUTION", DEFAULT_EXECUTION)
+        if execution == "process" and getattr(mod, "__file__", None):
+            runs.append((mod, _ProcessRun(mod, env_vars, schema)))
+        else:
+            # in-memory modules have no file to load in a child process
+            runs.append((mod, _ThreadRun(mod, env_vars, schema)))
+
+    all_issues = []
+    for mod, run in runs:
+        if run is None:
+            all_issues.append(_error_issue(mod, "missing register(registry) or run(env_vars, schema)"))
+            continue
+        if isinstance(run, dict):
+            all_issues.append(run)
+            continue
+        if isinstance(mod, PluginSpec):
+            limit = mod.timeout if mod.timeout is not None else timeout
         else:
+            limit = getattr(mod, "TIMEOUT", timeout)
+        issues = run.wait(max(0.0, started + limit - time.monotonic()))
+        if issues is None:
+            if isinstance(run, _ProcessRun):
+                run.kill()
             all_issues.append({
-                "type": "plugin_error",
-                "message": f"Plugin {getattr(mod, '__name__', 'unknown')} missing run(env_vars, schema)",
+                "type": "plugin_timeout",
+                "message": f"Plugin {_plugin_name(mod)} did not finish within {limit:g}s",
                 "severity": "warning"
             })
+            continue
+        all_issues.extend(issues)
     return all_issues
@@ -1,12 +1,23 @@
 # sample plugin: check that PORT is numeric and > 1024
-def run(env_vars, schema):
+
+# read without importing the plugin, so it is only loaded when PORT is set
+KEYS = ["PORT"]
+
+def check_port(key, value, env_vars, schema):
     issues = []
-    port = env_vars.get("PORT")
-    if port:
+    if value:
         try:
-            p = int(port)
+            p = int(value)
             if p <= 1024:
                 issues.append({"type":"plugin_port_low", "message": "PORT should be > 1024", "severity":"warning"})
         except ValueError:
             issues.append({"type":"plugin_port_invalid", "message":"PORT is not an integer", "severity":"error"})
     return issues
+
+def register(registry):
+    # called only for PORT, instead of scanning every variable
+    registry.on("PORT", check_port)
+
+# for loaders without register() support
+def run(env_vars, schema):
+    return check_port("PORT", env_vars.get("PORT"), env_vars, schema)
@@ -0,0 +1,107 @@
+# src/env_check/quick_scan.py
+"""
+quick_scan.py - time-budgeted secret scanning for pre-push hooks.
+
+Files are ordered by risk (.env files, then recently modified files, then
+config files, then everything else) and scanned until the deadline. Files
+that were not reached are remembered in a small state file and scanned
+first on the next run, so repeated quick scans eventually cover the tree.
+repo_scanner.detect_secret_leaks(budget=...) returns the findings list;
+repo_scanner.quick_scan_secret_leaks also reports the unreached files.
+"""
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CACHE_DIR = ".cache"
+STATE_PATH = os.path.join(CACHE_DIR, "quick_scan_state.json")
+
+CONFIG_EXTENSIONS = (
+    ".json", ".yml", ".yaml", ".ini", ".cfg", ".toml", ".conf", ".properties",
+)
+# files touched within this window count as "recently modified"
+RECENT_SECONDS = 7 * 24 * 3600
+
+_BUDGET_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m)?\s*$")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, None: 1.0}
+
+
+def parse_budget(budget) -> float:
+    """Accept seconds as a number or a string like "2s", "500ms", "1m"."""
+    if isinstance(budget, (int, float)):
+        return float(budget)
+    m = _BUDGET_RE.match(str(budget))
+    if not m:
+        raise ValueError(f"Invalid budget: {budget!r} (use e.g. 2s, 500ms, 1m)")
+    return float(m.group(1)) * _UNIT_SECONDS[m.group(2)]
+
+
+def load_skipped(state_path: str = STATE_PATH) -> List[str]:
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("not_reached", [])
+    except Exception:
+        return []
+
+
+def save_skipped(not_reached: List[str], state_path: str = STATE_PATH):
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = state_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"not_reached": not_reached}, f)
+    os.replace(tmp, state_path)
+
+
+def risk_tier(path: str, mtime: float, now: float) -> int:
+    """Lower tier = scanned earlier."""
+    name = os.path.basename(path).lower()
+    if name.startswith(".env") or name.endswith(".env"):
+        return 0
+    if now - mtime <= RECENT_SECONDS:
+        return 1
+    if name.endswith(CONFIG_EXTENSIONS):
+        return 2
+    return 3
+
+
+def _stat_or_none(path: str):
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def prioritize(paths: Iterable[str], previously_skipped: Iterable[str] = (), now: Optional[float] = None,
+               stat: Callable = _stat_or_none) -> List[str]:
+    """
+    Order paths for a budgeted scan: files the last run did not reach come
+    first, then by risk tier, newest first within a tier.
+    stat: path -> stat_result or None (RepoTree.stat reuses the walk's stats).
+    """
+    now = time.time() if now is None else now
+    skipped = set(previously_skipped)
+    keyed = []
+    for p in paths:
+        st = stat(p)
+        mtime = st.st_mtime if st is not None else 0.0
+        keyed.append(((p not in skipped, risk_tier(p, mtime, now), -mtime, p), p))
+    keyed.sort()
+    return [p for _, p in keyed]
+
+
+def scan_until(paths: List[str], deadline: float, scan_one: Callable[[str], List[Dict]]) -> Tuple[List[Dict], List[str]]:
+    """
+    Scan paths in order until time.perf_counter() passes `deadline`.
+    Returns (findings, not_reached). A file already being scanned when the
+    deadline passes is finished, never cut off half-way.
+    """
+    findings = []
+    for i, p in enumerate(paths):
+        if time.perf_counter() >= deadline:
+            return findings, paths[i:]
+        findings.extend(scan_one(p))
+    return findings, []
@@ -1,33 +1,40 @@
 # src/env_check/repo_scanner.py
 import os
 import fnmatch
-from .loader import load_env_file
+import time
+from functools import partial
+from .anomaly_detector import detect_all_anomalies
 from .drift import compare_env_dicts
-from .secret_heuristics import scan_paths, SEVERITY
+from .secret_heuristics import dedupe_findings, scan_text
 from .config_loader import load_config
+from .baseline import filter_new_findings
+from .sharding import select_shard
+from .journal import journaled, open_journal
+from .quick_scan import STATE_PATH as QUICK_SCAN_STATE, load_skipped, parse_budget, prioritize, save_skipped, scan_until
+from .utils import BINARY_SNIFF_BYTES, is_binary_chunk, load_env_dict, read_text
+from .walker import RepoTree
 
-def find_env_files(root):
-    """Find all .env-like files in the repository."""
-    env_files = []
-    for dirpath, _, filenames in os.walk(root):
-        for f in filenames:
-            lower = f.lower()
-            if lower.startswith(".env") or lower.endswith(".env") or ".env" in lower:
-                env_files.append(os.path.join(dirpath, f))
-    return env_files
+SCANNED_EXTENSIONS = (
+    ".py", ".js", ".ts", ".go", ".java", ".rb",
+    ".json", ".yml", ".yaml", ".env", ".ini", ".cfg",
+    ".sh", ".bash", ".dockerfile", "dockerfile", ".env.example"
+)
+
+def find_env_files(root, tree=None, include_ignored=False):
+    """
+    Find all .env-like files in the repository. include_ignored also
+    searches gitignored directories, which walks them in full (see
+    RepoTree.env_files).
+    """
+    tree = tree or RepoTree(root)
+    return tree.env_files(include_ignored)
 
 def is_binary_file(path):
     try:
         with open(path, "rb") as f:
-            chunk = f.read(2048)
-            if b"\x00" in chunk:
-                return True
-            # skip large binary-like files
-            if len(chunk) > 0 and chunk[:1] == b'\x1f':  # gzip/header indicator
-                return True
+            return is_binary_chunk(f.read(BINARY_SNIFF_BYTES))
     except:
         return True
-    return False
 
 def should_skip_path(path: str, config: dict) -> bool:
     # skip directories
@@ -48,47 +55,96 @@ def should_skip_path(path: str, config: dict) -> bool:
     return False
 
 
-def run_repo_scan(root):
+def _compare_pair(item):
+    f1, f2, env1, env2 = item
+    return f1, f2, compare_env_dicts(env1, env2)
+
+
+class _ProfileRecorder:
+    """Stands in for a DetectorProfile in a pool task; the caller replays the tallies."""
+
+    def __init__(self):
+        self.files = []
+
+    def add_file(self, path, file_stats):
+        self.files.append((path, file_stats))
+
+
+def _scan_candidate(fp, min_severity=None, profiled=False, keep_text=False):
+    """
+    read_text + scan_text for one file with no shared state touched, so it
+    can run in an executor. Returns (text if keep_text, findings, profile
+    tallies); fp None means the file is journaled and is skipped.
+    """
+    if fp is None:
+        return None, None, []
+    text = read_text(fp)
+    if text is None:
+        return None, [], []
+    recorder = _ProfileRecorder() if profiled else None
+    findings = scan_text(text, fp, profile=recorder, min_severity=min_severity)
+    return (text if keep_text else None), findings, (recorder.files if recorder else [])
+
+
+def run_repo_scan(root, shard=None, tree=None, executor=None, parsed=None, anomalies=False,
+                  include_ignored=False):
     """
     Scan entire repo for:
     - env files
     - drift between them
     - respects .envcheck.yml exclude settings
+    shard: "i/N" to only compute this node's share of the drift pairs
+    (merge node outputs with sharding.merge_reports).
+    tree: RepoTree already walked for this root (shared with
+    detect_secret_leaks / find_env_usage so the tree is listed once).
+    executor: env_check.executor.TaskExecutor to compare the drift pairs on.
+    parsed: dict {path: env} filled with every env file this scan parses
+    (with utils.load_env_dict, the parser anomaly_detector uses too);
+    pass it on to anomaly_detector.detect_anomalies(parsed=...) so the
+    files are not parsed again.
+    anomalies: True to also report anomaly_detector.detect_all_anomalies
+    for the env files (as "anomalies", {path: [...]}), using the same
+    parsed envs.
+    include_ignored: also look for env files inside gitignored directories
+    (walks those trees; see RepoTree.env_files).
     """
     result = {}
-    config = load_config(root)
-
-    # Find env files but respect exclude dirs
-    env_files = []
-    for dirpath, _, filenames in os.walk(root):
-        # skip excluded directories quickly
-        skip_dir = False
-        for ex in config.get("exclude_dirs", []):
-            if ex and ex in dirpath:
-                skip_dir = True
-                break
-        if skip_dir:
-            continue
+    tree = tree or RepoTree(root, load_config(root))
 
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            # skip files by pattern/binary
-            if should_skip_path(fp, config):
-                continue
-            lower = f.lower()
-            if lower.startswith(".env") or lower.endswith(".env") or ".env" in lower:
-                env_files.append(fp)
+    # excluded dirs and patterns were applied by the walk; only the
+    # (cheap, name-based) env filter runs before the binary sniff
+    env_files = [f for f in tree.env_files(include_ignored) if not is_binary_file(f)]
 
     result["env_files"] = env_files
 
+    # parse every env file once; drift, the linter and anomalies share it
+    parsed = {} if parsed is None else parsed
+
+    def env_of(path):
+        if path not in parsed:
+            parsed[path] = load_env_dict(path)
+        return parsed[path]
+
     # DRIFT DETECTION
-    drift_results = []
-    for i in range(len(env_files)):
-        for j in range(i + 1, len(env_files)):
-            f1, f2 = env_files[i], env_files[j]
-            env1 = load_env_file(f1)
-            env2 = load_env_file(f2)
-            drift_results.append((f1, f2, compare_env_dicts(env1, env2)))
+    pairs = [
+        (env_files[i], env_files[j])
+        for i in range(len(env_files))
+        for j in range(i + 1, len(env_files))
+    ]
+    if shard is not None:
+        sizes = {f: tree.size(f) for f in env_files}
+        pairs = select_shard(
+            pairs,
+            shard,
+            key=lambda p: p[0] + "\0" + p[1],
+            weight=lambda p: sizes[p[0]] + sizes[p[1]],
+        )
+
+    items = ((f1, f2, env_of(f1), env_of(f2)) for f1, f2 in pairs)
+    if executor is not None:
+        drift_results = list(executor.map(_compare_pair, items))
+    else:
+        drift_results = [_compare_pair(item) for item in items]
 
     result["drift"] = drift_results
 
@@ -97,7 +153,7 @@ def run_repo_scan(root):
     per_file_keys = {}
 
     for f in env_files:
-        data = load_env_file(f)
+        data = env_of(f)
         keys = set(data.keys())
         per_file_keys[f] = keys
         all_keys |= keys
@@ -112,57 +168,139 @@ def run_repo_scan(root):
     result["missing_env_vars"] = missing
     result["unused_env_vars"] = list(all_keys)
 
+    if anomalies:
+        result["anomalies"] = detect_all_anomalies(env_files, parsed=parsed)
+
     return result
 
 
-def detect_secret_leaks(root):
+def detect_secret_leaks(root, baseline=None, profile=None, min_severity=None,
+                        budget=None, state_path=None, shard=None, journal=None, resume=False,
+                        tree=None, text_analyzers=(), executor=None):
     """
     Apply advanced secret heuristics to all relevant files, honoring config.
+    baseline: Baseline or path to a baseline file; findings already accepted
+    there are dropped so only new leaks are returned.
+    profile: optional DetectorProfile filled with per-detector cost and hits.
+    min_severity: HIGH/MEDIUM/LOW/INFO; detectors that can only report below
+    it are never run (same result as filtering afterwards, much less work).
+    budget: time limit such as "2s" or 1.5 (seconds). Files are scanned in
+    risk order until the deadline; unreached files are saved to state_path
+    and go first next run. The findings list is returned as without a
+    budget (earlier versions returned a dict here); use
+    quick_scan_secret_leaks to also learn which files were not reached.
+    shard: "i/N" to scan only this node's size-balanced share of the files;
+    combine node outputs with sharding.merge_reports.
+    journal: path of an append-only journal of completed files; with
+    resume=True, files already journaled and unchanged are not rescanned.
+    tree: RepoTree already walked for this root, shared with run_repo_scan.
+    text_analyzers: callables (path, text) given the content of every file
+    this call reads (e.g. EnvUsageCollector.add), so other analyzers do not
+    open the file again. Files skipped via the journal are not re-read and
+    so are not passed on.
+    executor: env_check.executor.TaskExecutor to read and scan files on
+    (not used with budget, which scans in priority order until the
+    deadline). Analyzers, the profile and the journal are still updated
+    in this thread, in file order.
+    """
+    findings, _ = _scan_secret_leaks(
+        root, baseline, profile, min_severity, budget, state_path, shard,
+        journal, resume, tree, text_analyzers, executor,
+    )
+    return findings
+
+
+def quick_scan_secret_leaks(root, budget, baseline=None, profile=None, min_severity=None,
+                            state_path=None, shard=None, journal=None, resume=False,
+                            tree=None, text_analyzers=()):
     """
-    config = load_config(root)
+    detect_secret_leaks with a time budget, also reporting coverage:
+    {"findings": [...], "not_reached": [...], "complete": bool}.
+    The arguments are those of detect_secret_leaks.
+    """
+    findings, not_reached = _scan_secret_leaks(
+        root, baseline, profile, min_severity, budget, state_path, shard,
+        journal, resume, tree, text_analyzers, None,
+    )
+    return {"findings": findings, "not_reached": not_reached, "complete": not not_reached}
+
+
+def _scan_secret_leaks(root, baseline, profile, min_severity, budget, state_path, shard,
+                       journal, resume, tree, text_analyzers, executor):
+    """detect_secret_leaks, returning (findings, files the budget did not reach)."""
+    deadline = time.perf_counter() + parse_budget(budget) if budget is not None else None
+    tree = tree or RepoTree(root, load_config(root))
     candidates = []
 
-    for dirpath, _, filenames in os.walk(root):
-        # skip excluded directories
-        skip_dir = False
-        for ex in config.get("exclude_dirs", []):
-            if ex and ex in dirpath:
-                skip_dir = True
-                break
-        if skip_dir:
-            continue
+    for entry in tree.entries:
+        f = entry.name.lower()
+        # Scan programming & config files
+        if f.endswith(SCANNED_EXTENSIONS) or f.startswith(".env"):
+            candidates.append(entry.path)
 
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            # skip by pattern or binary
-            if should_skip_path(fp, config):
-                continue
+    if shard is not None:
+        candidates = select_shard(candidates, shard, weight=tree.size)
 
-            # Scan programming & config files
-            if f.lower().endswith((
-                ".py", ".js", ".ts", ".go", ".java", ".rb",
-                ".json", ".yml", ".yaml", ".env", ".ini", ".cfg",
-                ".sh", ".bash", ".dockerfile", "dockerfile", ".env.example"
-            )) or f.lower().startswith(".env"):
-                candidates.append(fp)
+    not_reached = []
+    with open_journal(journal, resume, {"min_severity": min_severity}) as jr:
+        def scan_one(fp):
+            # one open per file: the head decides binary vs text, and the
+            # text goes to every analyzer
+            text = read_text(fp)
+            if text is None:
+                return []
+            for analyze in text_analyzers:
+                analyze(fp, text)
+            return scan_text(text, fp, profile=profile, min_severity=min_severity)
 
-    findings = scan_paths(candidates)
+        scan_one = journaled(scan_one, jr)
+        if deadline is not None:
+            state_path = state_path or QUICK_SCAN_STATE
+            candidates = prioritize(candidates, load_skipped(state_path), stat=tree.stat)
+            findings, not_reached = scan_until(candidates, deadline, scan_one)
+            save_skipped(not_reached, state_path)
+        elif executor is not None:
+            findings = _scan_on(executor, candidates, jr, profile, min_severity, text_analyzers)
+        else:
+            findings = []
+            for fp in candidates:
+                findings.extend(scan_one(fp))
+    findings = filter_new_findings(findings, baseline, root)
 
     # Deduplicate (same file + line + snippet)
-    unique = {}
-    for f in findings:
-        key = (f.get("file"), f.get("line"), f.get("value_snippet"))
-        if key not in unique:
-            unique[key] = f
-        else:
-            # If duplicate exists, pick higher severity
-            old = unique[key]
-            try:
-                old_sev = SEVERITY.index(old["severity"])
-                new_sev = SEVERITY.index(f["severity"])
-                if new_sev > old_sev:
-                    unique[key] = f
-            except Exception:
-                pass
-
-    return list(unique.values())
+    findings = dedupe_findings(findings)
+    if profile is not None:
+        profile.count_hits(findings)
+    return findings, not_reached
+
+
+def _scan_on(executor, candidates, jr, profile, min_severity, text_analyzers):
+    """The unbudgeted scan loop of detect_secret_leaks, run on executor."""
+    plan = []
+    for fp in candidates:
+        # stat before scanning, as journaled() does
+        try:
+            st = os.stat(fp)
+        except OSError:
+            st = None
+        cached = jr.lookup(fp, st) if jr is not None and st is not None else None
+        plan.append((fp, st, cached))
+    scan = partial(
+        _scan_candidate, min_severity=min_severity,
+        profiled=profile is not None, keep_text=bool(text_analyzers),
+    )
+    results = executor.map(scan, (fp if cached is None else None for fp, _, cached in plan))
+    findings = []
+    for (fp, st, cached), (text, found, tallies) in zip(plan, results):
+        if cached is not None:
+            findings.extend(cached)
+            continue
+        if text is not None:
+            for analyze in text_analyzers:
+                analyze(fp, text)
+        for path, file_stats in tallies:
+            profile.add_file(path, file_stats)
+        if jr is not None:
+            jr.record(fp, found, st)
+        findings.extend(found)
+    return findings
@@ -1,40 +1,120 @@
 import os
 import re
+from functools import partial
 from glob import glob
 
-def find_env_usage(root_paths, keys):
+from env_check.executor import TaskExecutor
+from .utils import read_text
+from .walker import walk_files
+
+# every identifier-like word in a file; for a key made only of \w characters,
+# r"\bKEY\b" matches exactly when KEY is one of these words
+WORD = re.compile(r"\w+")
+FILES_PER_TASK = 64
+
+
+class KeyMatcher:
+    """
+    Finds which keys a text mentions in one tokenizing pass instead of one
+    regex search per key. Keys that are not plain words (e.g. "A.B") keep
+    the old per-key \bKEY\b search, so results are identical.
+    """
+
+    def __init__(self, keys):
+        keys = list(dict.fromkeys(keys))
+        self.word_keys = frozenset(k for k in keys if WORD.fullmatch(k))
+        self.other_patterns = {
+            k: re.compile(r"\b" + re.escape(k) + r"\b") for k in keys if k not in self.word_keys
+        }
+
+    def __call__(self, text):
+        found = set(self.word_keys.intersection(WORD.findall(text))) if self.word_keys else set()
+        for k, pat in self.other_patterns.items():
+            if pat.search(text):
+                found.add(k)
+        return found
+
+
+def _keys_in_file(matcher, path):
+    # every readable file is searched, binary-looking ones included, as
+    # find_env_usage always has
+    text = read_text(path, skip_binary=False)
+    # None (unreadable) is told apart from "read, no keys"
+    return None if text is None else matcher(text)
+
+
+class EnvUsageCollector:
+    """
+    Accumulates which files mention which keys. add() takes text that was
+    already read, so the secret scan can feed the same content it scanned
+    (detect_secret_leaks(text_analyzers=[collector.add])) instead of every
+    analyzer opening the file again. Fed that way it only sees the files the
+    secret scan reads as text, not binary-looking ones, unlike find_env_usage.
+    """
+
+    def __init__(self, keys):
+        self.usages = {k: [] for k in keys}
+        self.matcher = KeyMatcher(self.usages)
+
+    def add(self, path, text):
+        self.add_keys(path, self.matcher(text))
+
+    def add_keys(self, path, found):
+        for k in found:
+            self.usages[k].append(path)
+
+    def report(self):
+        # unused keys = keys with empty usage lists
+        unused = [k for k, v in self.usages.items() if not v]
+        issues = []
+        for k in unused:
+            issues.append({
+                "type": "unused_key",
+                "severity": "warning",
+                "key": k,
+                "message": f"Key '{k}' appears unused in scanned paths."
+            })
+        return issues, self.usages
+
+
+def find_env_usage(root_paths, keys, tree=None, workers=None, index=None):
     # root_paths: list of paths/globs to search (e.g., ["src/**/*.py", "templates/**/*.html"])
     # keys: iterable of variable names to search for
-    usages = {k: [] for k in keys}
-    key_patterns = {k: re.compile(r"\b" + re.escape(k) + r"\b") for k in keys}
+    # tree: optional walker.RepoTree from the same run, reused for directories it
+    #   lists as walk_files would (RepoTree.matches_walk), so the result is the
+    #   same with or without it
+    # workers: processes to tokenize files in (None/1 = in this process)
+    # index: usage_index.UsageIndex (or its path); only changed files are re-read
+    collector = EnvUsageCollector(keys)
     files = []
     for p in root_paths:
         # allow simple globs, handle directories by walking
         if os.path.isdir(p):
-            for dirpath, _, filenames in os.walk(p):
-                for fn in filenames:
-                    files.append(os.path.join(dirpath, fn))
+            if tree is not None and tree.covers(p) and tree.matches_walk(p):
+                files.extend(tree.files_under(p))
+            else:
+                files.extend(e.path for e in walk_files(p))
         else:
             files.extend(glob(p, recursive=True))
     files = sorted(set(files))
-    for file in files:
-        # skip binaries
+    if index is not None:
+        from .usage_index import UsageIndex
+        idx = UsageIndex(index) if isinstance(index, str) else index
         try:
-            with open(file, "r", encoding="utf-8", errors="ignore") as f:
-                txt = f.read()
-        except Exception:
-            continue
-        for k, pat in key_patterns.items():
-            if pat.search(txt):
-                usages[k].append(file)
-    # unused keys = keys with empty usage lists
-    unused = [k for k, v in usages.items() if not v]
-    issues = []
-    for k in unused:
-        issues.append({
-            "type": "unused_key",
-            "severity": "warning",
-            "key": k,
-            "message": f"Key '{k}' appears unused in scanned paths."
-        })
-    return issues, usages
+            idx.update(files, prune=False, workers=workers)
+            collector.usages.update(idx.usages(collector.usages, files=files))
+        finally:
+            if idx is not index:
+                idx.close()
+        return collector.report()
+    # one open per file; unreadable files are skipped
+    scan = partial(_keys_in_file, collector.matcher)
+    if workers and workers > 1 and len(files) > FILES_PER_TASK:
+        # map() keeps file order, so usage lists come out sorted as before
+        results = list(TaskExecutor("process", max_workers=workers, chunksize=FILES_PER_TASK).map(scan, files))
+    else:
+        results = map(scan, files)
+    for file, found in zip(files, results):
+        if found:
+            collector.add_keys(file, found)
+    return collector.report()
@@ -107,7 +107,7 @@ class SchemaValidator:
                     })
 
     def run_all_checks_parallel(self):
-        from concurrent.futures import ThreadPoolExecutor
+        from env_check.executor import TaskExecutor
 
         checks = [
             self.check_required,
@@ -115,7 +115,6 @@ class SchemaValidator:
             self.check_secrets
         ]
 
-        with ThreadPoolExecutor() as executor:
-            executor.map(lambda fn: fn(), checks)
+        TaskExecutor(mode="thread").run(checks)
 
         return self.issues
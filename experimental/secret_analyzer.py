@@ -1,5 +1,5 @@
-import math
 import re
+from .entropy import shannon_entropy
 
 class SecretAnalyzer:
     WEAK_PATTERNS = [
@@ -16,15 +16,7 @@ class SecretAnalyzer:
 
     @staticmethod
     def calculate_entropy(secret: str) -> float:
-        if not secret:
-            return 0.0
-        freq = {c: secret.count(c) for c in set(secret)}
-        length = len(secret)
-        entropy = 0.0
-        for count in freq.values():
-            p = count / length
-            entropy -= p * math.log2(p)
-        return entropy
+        return shannon_entropy(secret)
 
     @staticmethod
     def detect_token_type(secret: str):
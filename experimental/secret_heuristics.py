@@ -1,8 +1,13 @@
+import io
 import re
-import math
-from collections import Counter
-from typing import List, Dict, Optional
+from functools import lru_cache
+from time import perf_counter
+from typing import Iterable, List, Dict, Optional
 from .patterns import SECRET_PATTERNS
+from .baseline import filter_new_findings, secret_hash
+from .entropy import shannon_entropy, sliding_window_entropy
+from .detector_profile import DetectorProfile, TOKEN_DETECTOR, WINDOW_DETECTOR
+from .journal import journaled, open_journal
 
 # -----------------------------------------
 # 🔥 1. Regex Signature Patterns
@@ -26,6 +31,10 @@ CONTEXT_KEYWORDS = [
     "apikey", "api_key", "auth", "private", "jwt", "rsa", "ssh"
 ]
 
+# Lines at least this long also get the sliding-window entropy pass, which
+# finds keys embedded in URLs / JSON blobs that whole-token entropy dilutes
+LONG_LINE_THRESHOLD = 120
+
 # Severity Levels
 SEVERITY = {
     "HIGH": 3,
@@ -54,6 +63,7 @@ def classify_severity(pattern_name, value=None):
     ]
 
     medium_patterns = [
+        "high_entropy_window",
         "stripe_test_key",
         "cryptographic_material",
         "password",
@@ -82,27 +92,62 @@ def classify_severity(pattern_name, value=None):
 # 🔥 2. Entropy Calculation
 # -----------------------------------------
 
-def shannon_entropy(value: str) -> float:
-    """Compute Shannon entropy for the string."""
-    if not value:
-        return 0.0
-    freq = Counter(value)
-    length = len(value)
-    return -sum((count / length) * math.log2(count / length) for count in freq.values())
+# shannon_entropy is shared with the other detectors (memoized, see entropy.py)
 
 
 # -----------------------------------------
 # 🔥 3. Pattern Classification
 # -----------------------------------------
 
-def match_signature(value: str) -> Optional[str]:
+def match_signature(value: str, signatures=None) -> Optional[str]:
     """Return signature name if a pattern matches."""
-    for name, pattern in SIGNATURES.items():
+    for name, pattern in (signatures if signatures is not None else SIGNATURES.items()):
         if pattern.search(value):
             return name
     return None
 
 
+# -----------------------------------------
+# 🔥 3b. Severity pushdown
+# -----------------------------------------
+
+# heuristic (no signature) token findings are named random_hex or
+# suspicious_short_value, both LOW
+FALLBACK_SEVERITY = "LOW"
+
+
+@lru_cache(maxsize=None)
+def select_detectors(min_severity: Optional[str] = None):
+    """
+    Return (secret_patterns, signatures, run_fallback) needed to produce every
+    finding at or above min_severity; detectors that can only yield lower
+    severities are dropped before scanning instead of filtered afterwards.
+    Unknown/None thresholds keep everything (same as filter_by_min_severity).
+    """
+    min_score = SEVERITY.get((min_severity or "").upper())
+    if min_score is None:
+        return tuple(SECRET_PATTERNS.items()), tuple(SIGNATURES.items()), True
+
+    def keep(name):
+        return SEVERITY[classify_severity(name)] >= min_score
+
+    patterns = tuple((n, r) for n, r in SECRET_PATTERNS.items() if keep(n))
+    # match_signature reports only the first matching signature, so a
+    # low-severity one can still shadow a later one: only the tail after the
+    # last qualifying signature is safe to drop
+    signatures = tuple(SIGNATURES.items())
+    last = max((i for i, (n, _) in enumerate(signatures) if keep(n)), default=-1)
+    signatures = signatures[:last + 1]
+    run_fallback = SEVERITY[FALLBACK_SEVERITY] >= min_score
+    return patterns, signatures, run_fallback
+
+
+def select_window(min_severity: Optional[str] = None) -> bool:
+    """Whether the sliding-window entropy pass can report at min_severity."""
+    min_score = SEVERITY.get((min_severity or "").upper())
+    return min_score is None or SEVERITY[classify_severity(WINDOW_DETECTOR)] >= min_score
+
+
 # -----------------------------------------
 # 🔥 4. Context Score (keyword detection)
 # -----------------------------------------
@@ -131,10 +176,14 @@ def determine_severity(pattern: Optional[str], entropy: float, length: int, cont
 # 🔥 6. Scan a single string for secrets
 # -----------------------------------------
 
-def scan_string(value: str, surrounding_line: str = "") -> List[Dict]:
+def scan_string(value: str, surrounding_line: str = "", min_severity: Optional[str] = None) -> List[Dict]:
     findings = []
 
-    pattern = match_signature(value)
+    _, signatures, run_fallback = select_detectors(min_severity)
+    pattern = match_signature(value, signatures)
+    if pattern is None and not run_fallback:
+        # only the entropy/length fallback could fire, and it is below threshold
+        return findings
     entropy = shannon_entropy(value)
     length = len(value)
     ctx = context_score(surrounding_line + " " + value)
@@ -161,29 +210,95 @@ def scan_string(value: str, surrounding_line: str = "") -> List[Dict]:
 # 🔥 7. Scan a file for secrets
 # -----------------------------------------
 
-def scan_file(path: str) -> List[Dict]:
+def _tally(stats: Dict, detector: str, seconds: float, candidates: int):
+    row = stats.get(detector)
+    if row is None:
+        row = stats[detector] = [0.0, 0, 0]
+    row[0] += seconds
+    row[1] += 1
+    row[2] += candidates
+
+
+def _first_value(text: str) -> str:
+    """The leading quoted string or word of text, so a trailing comment is not part of it."""
+    m = re.match(r"\s*(?:'([^']*)'|\"([^\"]*)\"|([^\s;,#]+))", text)
+    if m is None:
+        return text.strip()
+    return next(g for g in m.groups() if g is not None)
+
+
+def extracted_secret(snippet: str, matched) -> str:
+    """
+    The secret a regex match points at: the matched text, or for
+    "password=" style patterns (which match the name and operator) the
+    value after it, without quotes, separators or a trailing comment.
+    """
+    text = matched.group(0)
+    if not text.endswith((":", "=")):
+        return text
+    return _first_value(snippet[matched.end():]) or text
+
+
+def scan_lines(lines: Iterable[str], path: str, profile=None, min_severity: Optional[str] = None) -> List[Dict]:
+    """
+    Scan already-read lines (file, git blob, archive member) for secrets.
+    profile: optional DetectorProfile; per-detector time and match counts
+    for this file are added to it.
+    min_severity: only run detectors that can report at or above this level
+    (HIGH/MEDIUM/LOW/INFO); findings below it are not returned.
+    """
     results = []
-
-    try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as file:
-            lines = file.readlines()
-    except:
-        return results
+    stats = {} if profile is not None else None
+    patterns, signatures, run_fallback = select_detectors(min_severity)
+    run_window = select_window(min_severity)
+    run_tokens = bool(signatures) or run_fallback
 
     for line_no, line in enumerate(lines, start=1):
         snippet = line.strip()
-        for pattern_name, regex in SECRET_PATTERNS.items():
-            if regex.search(snippet):
+        for pattern_name, regex in patterns:
+            if stats is not None:
+                t0 = perf_counter()
+                matched = regex.search(snippet)
+                _tally(stats, pattern_name, perf_counter() - t0, 1 if matched else 0)
+            else:
+                matched = regex.search(snippet)
+            if matched:
                 results.append({
                     "file": path,
                     "line": line_no,
                     "value_snippet": snippet,
+                    "secret_hash": secret_hash(extracted_secret(snippet, matched)),
                     "pattern": pattern_name,
                     "severity": classify_severity(pattern_name, snippet)
                 })
                 continue
 
+        if run_window and len(line) >= LONG_LINE_THRESHOLD:
+            if stats is not None:
+                t0 = perf_counter()
+                spans = sliding_window_entropy(line)
+                _tally(stats, WINDOW_DETECTOR, perf_counter() - t0, len(spans))
+            else:
+                spans = sliding_window_entropy(line)
+            for start, end, entropy in spans:
+                span = line[start:end]
+                results.append({
+                    "file": path,
+                    "line": line_no,
+                    "value_snippet": span[:60] + ("..." if len(span) > 60 else ""),
+                    "secret_hash": secret_hash(span),
+                    "pattern": "high_entropy_window",
+                    "entropy": entropy,
+                    "severity": classify_severity("high_entropy_window", span)
+                })
+
+        if not run_tokens:
+            continue
+
         # capture quoted values OR long tokens
+        if stats is not None:
+            t0 = perf_counter()
+            found_before = len(results)
         tokens = re.findall(r"['\"]([^'\"]{6,200})['\"]|([A-Za-z0-9\-_\.\/\+]{12,200})", line)
         tokens = [t[0] or t[1] for t in tokens]
 
@@ -193,7 +308,7 @@ def scan_file(path: str) -> List[Dict]:
             tokens.append(val.strip())
 
         for token in tokens:
-            findings = scan_string(token, surrounding_line=line)
+            findings = scan_string(token, surrounding_line=line, min_severity=min_severity)
             for f in findings:
                 # Use the new classify_severity function
                 pattern_name = f["pattern"]
@@ -212,36 +327,118 @@ def scan_file(path: str) -> List[Dict]:
                     "file": path,
                     "line": line_no,
                     "value_snippet": snippet,
+                    "secret_hash": secret_hash(_first_value(token)),
                     "pattern": pattern_name,
                     "severity": classify_severity(pattern_name, snippet)
                 })
-
+        if stats is not None:
+            _tally(stats, TOKEN_DETECTOR, perf_counter() - t0, len(results) - found_before)
+
+    if profile is not None:
+        profile.add_file(path, stats)
+    min_score = SEVERITY.get((min_severity or "").upper())
+    if min_score is not None:
+        # a kept signature can still shadow-match below the threshold
+        results = [r for r in results if SEVERITY.get(r["severity"], 0) >= min_score]
     return results
 
 
+def scan_file(path: str, profile=None, min_severity: Optional[str] = None) -> List[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as file:
+            lines = file.readlines()
+    except:
+        return []
+
+    return scan_lines(lines, path, profile=profile, min_severity=min_severity)
+
+
+def scan_text(text: str, path: str, profile=None, min_severity: Optional[str] = None) -> List[Dict]:
+    """scan_file() for content the caller has already read."""
+    # split like readlines(): only on "\n", keeping it
+    return scan_lines(io.StringIO(text).readlines(), path, profile=profile, min_severity=min_severity)
+
+
+def dedupe_findings(findings: Iterable[Dict]) -> List[Dict]:
+    """Deduplicate (same file + line + snippet); the higher severity wins."""
+    unique = {}
+    for f in findings:
+        key = (f.get("file"), f.get("line"), f.get("value_snippet"))
+        old = unique.get(key)
+        if old is None or SEVERITY.get(f.get("severity"), 0) > SEVERITY.get(old.get("severity"), 0):
+            unique[key] = f
+    return list(unique.values())
+
+
 # -----------------------------------------
 # 🔥 8. Scan multiple files
 # -----------------------------------------
 
-def scan_paths(paths: List[str]) -> List[Dict]:
+def scan_paths(paths: List[str], profile=None, min_severity: Optional[str] = None) -> List[Dict]:
     all_results = []
     for p in paths:
-        all_results.extend(scan_file(p))
+        all_results.extend(scan_file(p, profile=profile, min_severity=min_severity))
     return all_results
 
 
-def run_secret_scan(path):
+def run_secret_scan(path, history=False, checkpoint_path=None, archive=False, baseline=None,
+                    profile_detectors=None, min_severity=None, journal=None, resume=False):
+    """
+    Scan a file or directory tree for secrets.
+    history=True scans every blob reachable from HEAD in the git repo at
+    `path` instead of the working tree (resuming from checkpoint_path).
+    archive=True treats `path` as a tar/zip archive or `docker save` image
+    and streams its members through the scanner.
+    baseline: Baseline or baseline file path; accepted findings are not printed.
+    profile_detectors: True to print a ranked per-detector cost table after
+    the scan, or a path to also write the profile as JSON (working tree only).
+    min_severity: skip detectors that cannot report at this level or above
+    (e.g. "HIGH" for pre-commit); working tree only.
+    journal: path of an append-only journal of completed files; with
+    resume=True an interrupted scan skips files already journaled and
+    unchanged (working tree only).
+    """
     import os
+    if archive:
+        from .archive_scanner import scan_archive
+        print(f"Scanning archive {path}...")
+        report = scan_archive(path)
+        for env_file in report["env_files"]:
+            print(f"[ENV FILE] {env_file}")
+        for f in filter_new_findings(report["findings"], baseline):
+            print(f"[{f['severity']}] {f['file']}:{f['line']} {f['pattern']} -> {f['value_snippet']}")
+        return
+    if history:
+        from .git_history import scan_git_history, CHECKPOINT_PATH
+        print(f"Scanning git history in {path}...")
+        findings = scan_git_history(path, checkpoint_path=checkpoint_path or CHECKPOINT_PATH)
+        findings = filter_new_findings(findings, baseline)
+        for f in findings:
+            print(f"[{f['severity']}] {f['commit'][:12]} {f['file']}:{f['line']} {f['pattern']} -> {f['value_snippet']}")
+        return
+
     candidates = []
     if os.path.isfile(path):
         candidates.append(path)
     else:
-        for dirpath, _, filenames in os.walk(path):
-            for f in filenames:
-                candidates.append(os.path.join(dirpath, f))
+        from .walker import walk_files
+        candidates = [e.path for e in walk_files(path)]
 
-    findings = scan_paths(candidates)
+    profile = DetectorProfile() if profile_detectors else None
+    findings = []
+    with open_journal(journal, resume, {"min_severity": min_severity}) as jr:
+        scan_one = journaled(lambda fp: scan_file(fp, profile=profile, min_severity=min_severity), jr)
+        for fp in candidates:
+            findings.extend(scan_one(fp))
+    findings = filter_new_findings(findings, baseline, path if os.path.isdir(path) else None)
     print(f"Scanning secrets in {path}...")
     for f in findings:
         print(f"[{f['severity']}] {f['file']}:{f['line']} {f['pattern']} -> {f['value_snippet']}")
 
+    if profile is not None:
+        profile.count_hits(findings)
+        print("\nDetector profile:")
+        print(profile.format_table())
+        if isinstance(profile_detectors, str):
+            profile.write_json(profile_detectors)
+
@@ -0,0 +1,142 @@
+# src/env_check/sharding.py
+"""
+sharding.py - split scans across CI nodes and merge their reports.
+
+Every node enumerates the same checkout, so a deterministic assignment
+needs no coordination: items are ordered by (size desc, path hash) and each
+is given to the currently lightest shard (greedy longest-processing-time).
+Shards end up with near-equal byte counts, so wall-clock time scales with
+the node count instead of being set by whichever shard drew the big files.
+"""
+import hashlib
+import heapq
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .secret_heuristics import dedupe_findings
+
+
+def parse_shard(spec) -> Tuple[int, int]:
+    """Parse "i/N" (1-based, as in CI_NODE_INDEX/CI_NODE_TOTAL) into (i, N)."""
+    if isinstance(spec, tuple):
+        index, count = spec
+    else:
+        try:
+            index, count = (int(x) for x in str(spec).split("/", 1))
+        except ValueError:
+            raise ValueError(f"Invalid shard {spec!r} (expected i/N, e.g. 3/16)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {index}/{count}: need 1 <= i <= N")
+    return index, count
+
+
+def _stable_hash(text: str) -> int:
+    # builtin hash() is salted per process; shards must agree across nodes
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def partition(
+    items: Iterable,
+    count: int,
+    key: Callable = str,
+    weight: Callable = file_size,
+) -> List[List]:
+    """Split items into `count` lists of roughly equal total weight."""
+    ordered = sorted(
+        ((weight(item), _stable_hash(key(item)), key(item), item) for item in items),
+        key=lambda t: (-t[0], t[1], t[2]),
+    )
+    shards = [[] for _ in range(count)]
+    loads = [(0, i) for i in range(count)]
+    for w, _, _, item in ordered:
+        load, i = heapq.heappop(loads)
+        shards[i].append(item)
+        # every item costs at least something, so empty files still spread out
+        heapq.heappush(loads, (load + max(w, 1), i))
+    return shards
+
+
+def select_shard(items: Iterable, shard, key: Callable = str, weight: Callable = file_size) -> List:
+    """Items belonging to shard "i/N", in their original order."""
+    items = list(items)
+    index, count = parse_shard(shard)
+    if count == 1:
+        return items
+    mine = set(partition(
+        range(len(items)),
+        count,
+        key=lambda i: key(items[i]),
+        weight=lambda i: weight(items[i]),
+    )[index - 1])
+    return [item for i, item in enumerate(items) if i in mine]
+
+
+# -----------------------------------------
+# Shard reports
+# -----------------------------------------
+
+def write_shard_report(path: str, report, shard):
+    """
+    Write one shard's output (a findings list from detect_secret_leaks or a
+    run_repo_scan dict) as JSON tagged with its shard spec.
+    """
+    index, count = parse_shard(shard)
+    data = {"findings": report} if isinstance(report, list) else dict(report)
+    if "drift" in data:
+        data["drift"] = [list(d) for d in data["drift"]]
+    data["shard"] = f"{index}/{count}"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def merge_reports(paths: Iterable[str], out_path: Optional[str] = None) -> Dict:
+    """
+    Combine shard reports into one. Findings are deduplicated across shards
+    (same file + line + snippet, higher severity wins), drift entries by file
+    pair, and the shard specs are checked so a missing node is visible.
+    """
+    merged = {"findings": [], "env_files": [], "drift": [], "missing_env_vars": {}, "unused_env_vars": []}
+    findings = []
+    drift = {}
+    env_files = set()
+    unused = set()
+    seen_shards = set()
+    total = None
+
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("shard"):
+            index, count = parse_shard(data["shard"])
+            seen_shards.add(index)
+            total = count if total is None else total
+            if count != total:
+                raise ValueError(f"{path} is shard {index}/{count}, expected N={total}")
+        findings.extend(data.get("findings", []))
+        env_files.update(data.get("env_files", []))
+        unused.update(data.get("unused_env_vars", []))
+        merged["missing_env_vars"].update(data.get("missing_env_vars", {}))
+        for f1, f2, result in data.get("drift", []):
+            drift[(f1, f2)] = result
+
+    merged["findings"] = sorted(
+        dedupe_findings(findings),
+        key=lambda f: (f.get("file") or "", f.get("line") or 0, f.get("pattern") or ""),
+    )
+    merged["env_files"] = sorted(env_files)
+    merged["unused_env_vars"] = sorted(unused)
+    merged["drift"] = [[f1, f2, drift[(f1, f2)]] for f1, f2 in sorted(drift)]
+    merged["missing_shards"] = sorted(set(range(1, total + 1)) - seen_shards) if total else []
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+    return merged
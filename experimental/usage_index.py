@@ -0,0 +1,240 @@
+# src/env_check/usage_index.py
+"""
+usage_index.py - persistent identifier -> files index for usage checks.
+
+The index lives in one SQLite file. For every indexed file it stores the
+size, mtime and a content hash, plus the set of \\w+ words in the file.
+update() only re-reads files whose size or mtime changed, and only
+re-tokenizes those whose content hash changed. A warm CI run therefore
+costs one stat per file, and lookups such as "which files read
+FEATURE_CHECKOUT_V2" or "which schema keys are unreferenced" are indexed
+queries.
+
+The database is in WAL mode with a busy timeout, so jobs sharing the index
+can read while one of them updates it.
+"""
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from env_check.executor import TaskExecutor
+from .repo_usage_checker import WORD, KeyMatcher
+from .utils import read_text
+
+INDEX_PATH = os.path.join(".cache", "usage_index.sqlite")
+FILES_PER_TASK = 64
+# seconds an update waits for another job's write before giving up
+BUSY_TIMEOUT = 30.0
+# bump when what is indexed per file changes; older indexes are rebuilt
+# (2: binary-looking files are tokenized too)
+FORMAT = 2
+# SQLite's default limit on host parameters per statement is 999
+QUERY_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (token, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+
+def _tokenize_file(path: str, known_hash: Optional[str] = None):
+    """
+    (content hash, words) from one read of the file. words is None when the
+    hash equals known_hash (nothing to re-index); the hash is None when the
+    file cannot be read. Binary-looking files are tokenized too, as
+    find_env_usage searches them.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest == known_hash:
+        return digest, None
+    return digest, list(set(WORD.findall(data.decode("utf-8", errors="ignore"))))
+
+
+def _tokenize_item(item):
+    return _tokenize_file(*item)
+
+
+def _batches(items: List, size: int = QUERY_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class UsageIndex:
+    def __init__(self, path: str = INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != FORMAT:
+            with self.conn:
+                self.conn.execute("DROP TABLE IF EXISTS postings")
+                self.conn.execute("DROP TABLE IF EXISTS files")
+                self.conn.execute(f"PRAGMA user_version = {FORMAT}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, paths: Iterable[str], prune: bool = True, workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Bring the index up to date for `paths`. Unchanged files (same size
+        and mtime) are not opened; touched files whose hash is unchanged are
+        not re-tokenized. Listed files that can no longer be stat'ed or read
+        are dropped from the index; prune=True also drops files that are no
+        longer listed. Returns counts {"indexed", "unchanged", "removed"}.
+        """
+        paths = list(dict.fromkeys(paths))
+        known = {
+            row[0]: row[1:]
+            for row in self.conn.execute("SELECT path, id, size, mtime_ns, hash FROM files")
+        }
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+
+        stale = []
+        stat_of = {}
+        # ids of indexed files that are listed but can no longer be read
+        unreadable = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError:
+                if p in known:
+                    unreadable.append(known[p][0])
+                continue
+            stat_of[p] = st
+            row = known.get(p)
+            if row is not None and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                stats["unchanged"] += 1
+            else:
+                stale.append(p)
+
+        hashes = [known[p][3] if p in known else None for p in stale]
+        if workers and workers > 1 and len(stale) > FILES_PER_TASK:
+            results = list(TaskExecutor("process", max_workers=workers, chunksize=FILES_PER_TASK).map(
+                _tokenize_item, zip(stale, hashes)
+            ))
+        else:
+            results = map(_tokenize_file, stale, hashes)
+
+        with self.conn:
+            for p, (digest, tokens) in zip(stale, results):
+                row = known.get(p)
+                if digest is None:
+                    if row is not None:
+                        unreadable.append(row[0])
+                    continue
+                st = stat_of[p]
+                if tokens is None:
+                    # touched but identical: refresh the stat, keep the postings
+                    self.conn.execute(
+                        "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                        (st.st_size, st.st_mtime_ns, row[0]),
+                    )
+                    stats["unchanged"] += 1
+                    continue
+                if row is None:
+                    file_id = self.conn.execute(
+                        "INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                        (p, st.st_size, st.st_mtime_ns, digest),
+                    ).lastrowid
+                else:
+                    file_id = row[0]
+                    self.conn.execute(
+                        "UPDATE files SET size = ?, mtime_ns = ?, hash = ? WHERE id = ?",
+                        (st.st_size, st.st_mtime_ns, digest, file_id),
+                    )
+                    self.conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                self.conn.executemany(
+                    "INSERT INTO postings (token, file_id) VALUES (?, ?)",
+                    ((t, file_id) for t in tokens),
+                )
+                stats["indexed"] += 1
+
+            gone = unreadable
+            if prune:
+                listed = set(paths)
+                gone = gone + [row[0] for p, row in known.items() if p not in listed]
+            for batch in _batches(gone):
+                marks = ",".join("?" * len(batch))
+                self.conn.execute(f"DELETE FROM postings WHERE file_id IN ({marks})", batch)
+                self.conn.execute(f"DELETE FROM files WHERE id IN ({marks})", batch)
+            stats["removed"] = len(gone)
+        return stats
+
+    def files_using(self, key: str) -> List[str]:
+        """Indexed files that mention `key` as a whole word."""
+        if not WORD.fullmatch(key):
+            # not a single token ("A.B"): every word run in the key must also
+            # be a whole token of a matching file, so only files having all
+            # of them are read and checked with the regex
+            parts = sorted(set(WORD.findall(key)))
+            if parts:
+                query = " INTERSECT ".join(
+                    ["SELECT f.path FROM postings p JOIN files f ON f.id = p.file_id WHERE p.token = ?"] * len(parts)
+                )
+                paths = sorted(r[0] for r in self.conn.execute(query, parts))
+            else:
+                paths = [r[0] for r in self.conn.execute("SELECT path FROM files ORDER BY path")]
+            matcher = KeyMatcher([key])
+            return [p for p in paths if matcher(read_text(p, skip_binary=False) or "")]
+        return [
+            r[0] for r in self.conn.execute(
+                "SELECT f.path FROM postings p JOIN files f ON f.id = p.file_id "
+                "WHERE p.token = ? ORDER BY f.path",
+                (key,),
+            )
+        ]
+
+    def usages(self, keys: Iterable[str], files: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        {key: sorted files mentioning it}, the same shape find_env_usage
+        returns. files restricts the answer to that subset of the index.
+        """
+        keys = list(dict.fromkeys(keys))
+        out = {k: [] for k in keys}
+        word_keys = {k for k in keys if WORD.fullmatch(k)}
+        for batch in _batches([k for k in keys if k in word_keys]):
+            marks = ",".join("?" * len(batch))
+            for token, path in self.conn.execute(
+                f"SELECT p.token, f.path FROM postings p JOIN files f ON f.id = p.file_id "
+                f"WHERE p.token IN ({marks}) ORDER BY f.path",
+                batch,
+            ):
+                out[token].append(path)
+        for k in keys:
+            if k not in word_keys:
+                out[k] = self.files_using(k)
+        if files is not None:
+            allowed = set(files)
+            out = {k: [p for p in v if p in allowed] for k, v in out.items()}
+        return out
+
+    def unreferenced(self, keys: Iterable[str]) -> List[str]:
+        """Keys that no indexed file mentions, in input order."""
+        return [k for k, v in self.usages(keys).items() if not v]
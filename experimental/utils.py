@@ -0,0 +1,64 @@
+# src/env_check/utils.py
+
+BINARY_SNIFF_BYTES = 2048
+
+
+def is_binary_chunk(chunk: bytes) -> bool:
+    """Heuristic binary check on the first few KB of a file or blob."""
+    if b"\x00" in chunk:
+        return True
+    # gzip/header indicator
+    if len(chunk) > 0 and chunk[:1] == b"\x1f":
+        return True
+    return False
+
+
+def is_env_filename(name: str) -> bool:
+    """True for .env-like file names (.env, .env.prod, prod.env, ...)."""
+    lower = name.lower()
+    return lower.startswith(".env") or lower.endswith(".env") or ".env" in lower
+
+
+def read_text(path: str, skip_binary: bool = True):
+    """
+    Open `path` once: the first BINARY_SNIFF_BYTES decide binary vs text and,
+    for text, the rest is read from the same handle. Returns the decoded text,
+    or None for binary or unreadable files. Newlines are translated as in
+    text mode, so callers see what open(path, "r") would have given them.
+    skip_binary=False decodes binary-looking files too (None only when the
+    file cannot be read).
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(BINARY_SNIFF_BYTES)
+            if skip_binary and is_binary_chunk(head):
+                return None
+            data = head + f.read()
+    except OSError:
+        return None
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        # the universal-newline translation open(path, "r") would have done
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def load_env_dict(path: str) -> dict:
+    """
+    Parse a .env file into {key: value}: blank lines, "#" comments and
+    lines without "=" are skipped, keys and values are stripped. The one
+    parser behind drift_detection.load_env_file and the shared `parsed`
+    maps of run_repo_scan and anomaly_detector, so every caller sees the
+    same env for a path.
+    """
+    env = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            env[key.strip()] = value.strip()
+    return env
@@ -0,0 +1,363 @@
+# src/env_check/walker.py
+"""
+walker.py - one os.scandir walk of the repository shared by every scanner.
+
+Excluded directories (config exclude_dirs) and directories matched by a
+.gitignore are pruned before descending, so node_modules, build output and
+virtualenvs are never listed. Ignored *files* are still returned: a
+gitignored .env is exactly what the env and secret scanners look for.
+RepoTree.env_files(include_ignored=True) also searches the pruned
+gitignored directories for them; that walks those trees, so it is opt-in.
+.gitignore files above the walked directory, up to the enclosing work tree,
+apply as they do in git.
+Files are yielded as os.DirEntry objects, whose stat() result is cached and
+reused by sharding, quick-scan ordering and the resume journal.
+
+RepoTree(use_git=True) lists a git work tree with git ls-files instead.
+That applies .gitignore exactly as git does, including global excludes,
+.git/info/exclude and tracked files inside ignored directories. Outside a
+work tree it falls back to the walk.
+"""
+import fnmatch
+import os
+import subprocess
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .utils import is_env_filename
+
+# never worth descending into, whatever the config says
+ALWAYS_PRUNE = (".git",)
+
+
+def _norm(path: str) -> str:
+    return os.path.normpath(path).replace(os.sep, "/").strip("/")
+
+
+def _read_gitignore(path: str, base: str) -> List[Tuple[str, bool, bool, bool]]:
+    """
+    Parse a .gitignore into (pattern, negated, anchored, dir_only) rules.
+    base is the directory of the file relative to the walk root ("" at root).
+    """
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # a slash anywhere but the end anchors the pattern to this directory
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            continue
+        if line.startswith("**/"):
+            line, anchored = line[3:], False
+        rules.append((f"{base}/{line}" if base and anchored else line, negated, anchored, dir_only))
+    return rules
+
+
+def _ignored(rel: str, name: str, is_dir: bool, rules: List[Tuple[str, bool, bool, bool]]) -> bool:
+    ignored = False
+    # last matching rule wins, as in git
+    for pattern, negated, anchored, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        target = rel if anchored else name
+        if fnmatch.fnmatchcase(target, pattern):
+            ignored = not negated
+    return ignored
+
+
+def _excluded_dir(rel: str, name: str, exclude_dirs: Iterable[str]) -> bool:
+    for ex in exclude_dirs:
+        if name == ex or rel == ex or rel.startswith(ex + "/"):
+            return True
+    return False
+
+
+def _under_excluded(rel: str, exclude_dirs: Iterable[str]) -> bool:
+    """True if rel (relative to the root) is an excluded directory or lies in one."""
+    parts = rel.split("/")
+    return any(
+        _excluded_dir("/".join(parts[:i + 1]), parts[i], exclude_dirs)
+        for i in range(len(parts))
+    )
+
+
+def _ancestor_gitignore(top: str) -> Tuple[str, List[Tuple[str, bool, bool, bool]]]:
+    """
+    (top relative to its enclosing work tree, rules of the .gitignore files
+    between them). ("", []) when top is the work tree root or is not in one.
+    """
+    top = os.path.abspath(top)
+    parts = []
+    base = top
+    while not os.path.exists(os.path.join(base, ".git")):
+        parent = os.path.dirname(base)
+        if parent == base:
+            return "", []
+        base, name = parent, os.path.basename(base)
+        parts.insert(0, name)
+    rules = []
+    for i in range(len(parts)):
+        directory = os.path.join(base, *parts[:i])
+        rules += _read_gitignore(os.path.join(directory, ".gitignore"), "/".join(parts[:i]))
+    return "/".join(parts), rules
+
+
+def walk_files(
+    root: str,
+    exclude_dirs: Iterable[str] = (),
+    exclude_patterns: Iterable[str] = (),
+    gitignore: bool = True,
+    pruned: Optional[List[Tuple[str, str, str]]] = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Yield a DirEntry for every regular file under root, pruning excluded and
+    gitignored directories before they are opened. entry.path has the same
+    form os.walk would give (root joined with the relative path).
+    pruned: list that receives (path, relative path, "gitignore" or
+    "exclude") for every directory or file left out by the rules above
+    (.git is not recorded).
+    """
+    return _walk(root, "", exclude_dirs, exclude_patterns, gitignore, pruned)
+
+
+def _walk(top, rel_top, exclude_dirs, exclude_patterns, gitignore, pruned) -> Iterator[os.DirEntry]:
+    """walk_files() of top, which is rel_top relative to the root exclude_dirs refer to."""
+    exclude_dirs = tuple(_norm(ex) for ex in exclude_dirs if ex)
+    exclude_patterns = tuple(exclude_patterns)
+    # gitignore rules match paths relative to the work tree, not to top
+    git_top, rules = _ancestor_gitignore(top) if gitignore else ("", [])
+    # (directory path, path relative to root, path relative to the work
+    # tree, inherited gitignore rules)
+    stack = [(top, rel_top, git_top, rules)]
+    while stack:
+        dirpath, rel_dir, git_dir, rules = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if gitignore and any(e.name == ".gitignore" for e in entries):
+            rules = rules + _read_gitignore(os.path.join(dirpath, ".gitignore"), git_dir)
+
+        subdirs = []
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            git_rel = f"{git_dir}/{entry.name}" if git_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in ALWAYS_PRUNE:
+                    continue
+                if _excluded_dir(rel, entry.name, exclude_dirs):
+                    if pruned is not None:
+                        pruned.append((entry.path, rel, "exclude"))
+                    continue
+                if rules and _ignored(git_rel, entry.name, True, rules):
+                    if pruned is not None:
+                        pruned.append((entry.path, rel, "gitignore"))
+                    continue
+                subdirs.append((entry.path, rel, git_rel, rules))
+            elif entry.is_file():
+                if any(fnmatch.fnmatch(entry.path, p) or fnmatch.fnmatch(entry.name, p) for p in exclude_patterns):
+                    if pruned is not None:
+                        pruned.append((entry.path, rel, "exclude"))
+                    continue
+                yield entry
+        # reversed so the stack pops subdirectories in name order
+        stack.extend(reversed(subdirs))
+
+
+class IndexEntry:
+    """The parts of os.DirEntry the scanners use, for paths listed by git."""
+    __slots__ = ("path", "name", "_stat")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = path.rpartition(os.sep)[2]
+        self._stat = None
+
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+def _git_ls_files(root: str, *queries: Tuple[str, ...]) -> Optional[List[List[str]]]:
+    """Run one `git ls-files -z` per query concurrently; None outside a work tree."""
+    procs = []
+    try:
+        for args in queries:
+            procs.append(subprocess.Popen(
+                ["git", "-C", root, "ls-files", "-z", *args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ))
+        outputs = [proc.communicate()[0] for proc in procs]
+    except OSError:
+        for proc in procs:
+            proc.kill()
+        return None
+    if any(proc.returncode for proc in procs):
+        return None
+    return [[p for p in out.decode("utf-8", "surrogateescape").split("\0") if p] for out in outputs]
+
+
+def git_files(
+    root: str,
+    exclude_dirs: Iterable[str] = (),
+    exclude_patterns: Iterable[str] = (),
+    pruned: Optional[List[Tuple[str, str, str]]] = None,
+) -> Optional[List[IndexEntry]]:
+    """
+    Files under root according to git: tracked and untracked-not-ignored
+    (git ls-files --cached --others --exclude-standard), plus ignored files
+    that are not inside an ignored directory, matching walk_files(). Returns
+    None when root is not inside a git work tree.
+    pruned: as for walk_files(); ignored directories are recorded as
+    "gitignore", files left out by exclude_dirs/exclude_patterns as "exclude".
+    """
+    results = _git_ls_files(
+        root,
+        ("--cached", "--others", "--exclude-standard"),
+        # with --directory an ignored directory is one "dir/" line, not its contents
+        ("--others", "--ignored", "--exclude-standard", "--directory"),
+    )
+    if results is None:
+        return None
+    listed, ignored = results
+
+    exclude_dirs = tuple(_norm(ex) for ex in exclude_dirs if ex)
+    exclude_patterns = tuple(exclude_patterns)
+    prefix = os.path.join(root, "")
+    entries = []
+    # files deleted from the work tree but still in the index are kept: the
+    # scanners already skip paths they cannot open, and checking here would
+    # cost an lstat per file
+    for rel in sorted(set(listed).union(ignored)):
+        # ignored directories and untracked nested repositories end in "/"
+        if rel.endswith("/"):
+            rel = rel.rstrip("/")
+            if pruned is not None and not _under_excluded(rel, exclude_dirs):
+                pruned.append((prefix + rel.replace("/", os.sep), rel, "gitignore"))
+            continue
+        path = prefix + rel.replace("/", os.sep)
+        if exclude_dirs and _under_excluded(rel.rpartition("/")[0], exclude_dirs):
+            if pruned is not None:
+                pruned.append((path, rel, "exclude"))
+            continue
+        entry = IndexEntry(path)
+        if exclude_patterns and any(
+            fnmatch.fnmatch(entry.path, p) or fnmatch.fnmatch(entry.name, p) for p in exclude_patterns
+        ):
+            if pruned is not None:
+                pruned.append((path, rel, "exclude"))
+            continue
+        entries.append(entry)
+    return entries
+
+
+class RepoTree:
+    """
+    The file list of one repository, enumerated once and shared by
+    run_repo_scan, detect_secret_leaks and find_env_usage in the same run.
+    """
+
+    def __init__(self, root: str, config: Optional[Dict] = None, gitignore: bool = True, use_git: bool = False):
+        """
+        use_git: list files from the git index when root is in a work tree
+        (falls back to the scandir walk elsewhere, or with gitignore=False).
+        """
+        config = config or {}
+        self.root = root
+        self.gitignore = gitignore
+        self.exclude_dirs = config.get("exclude_dirs", [])
+        self.exclude_patterns = config.get("exclude_patterns", [])
+        # (path, relative path, reason) of everything the listing left out
+        self.pruned: List[Tuple[str, str, str]] = []
+        entries = None
+        if use_git and gitignore:
+            entries = git_files(root, self.exclude_dirs, self.exclude_patterns, pruned=self.pruned)
+        self.source = "git" if entries is not None else "walk"
+        if entries is None:
+            self.pruned = []
+            entries = list(walk_files(
+                root, self.exclude_dirs, self.exclude_patterns, gitignore=gitignore, pruned=self.pruned,
+            ))
+        self.entries = entries
+        self._by_path = {e.path: e for e in self.entries}
+        self._env_files: Optional[List[str]] = None
+
+    @property
+    def paths(self) -> List[str]:
+        return [e.path for e in self.entries]
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        entry = self._by_path.get(path)
+        try:
+            return entry.stat() if entry is not None else os.stat(path)
+        except OSError:
+            return None
+
+    def size(self, path: str) -> int:
+        st = self.stat(path)
+        return st.st_size if st is not None else 0
+
+    def env_files(self, include_ignored: bool = False) -> List[str]:
+        """
+        .env-like files in the listing, gitignored ones included.
+        include_ignored: also search the gitignored directories the listing
+        pruned. That walks every such tree (node_modules, virtualenvs, build
+        output) in full, so it is off by default; exclude_dirs and
+        exclude_patterns from the config still apply.
+        """
+        paths = [e.path for e in self.entries if is_env_filename(e.name)]
+        if not include_ignored:
+            return paths
+        if self._env_files is None:
+            for path, rel, reason in self.pruned:
+                if reason != "gitignore":
+                    continue
+                walk = _walk(path, rel, self.exclude_dirs, self.exclude_patterns, False, None)
+                paths.extend(e.path for e in walk if is_env_filename(e.name))
+            # a tracked file in an ignored directory is listed by both
+            self._env_files = list(dict.fromkeys(paths))
+        return self._env_files
+
+    def files_under(self, directory: str) -> List[str]:
+        """Paths below `directory` (which must lie inside root)."""
+        prefix = os.path.join(os.path.abspath(directory), "")
+        return [e.path for e in self.entries if os.path.abspath(e.path).startswith(prefix)]
+
+    def matches_walk(self, directory: str) -> bool:
+        """
+        True if files_under(directory) is exactly what walk_files(directory)
+        lists: the tree was walked with gitignore applied, `directory` is not
+        inside a pruned directory, and no config exclusion left anything out
+        at or below it.
+        """
+        if self.source != "walk" or not self.gitignore:
+            return False
+        prefix = os.path.join(os.path.abspath(directory), "")
+        for path, _, reason in self.pruned:
+            path = os.path.join(os.path.abspath(path), "")
+            if prefix.startswith(path) or (reason == "exclude" and path.startswith(prefix)):
+                return False
+        return True
+
+    def covers(self, directory: str) -> bool:
+        root = os.path.abspath(self.root)
+        directory = os.path.abspath(directory)
+        return directory == root or directory.startswith(os.path.join(root, ""))
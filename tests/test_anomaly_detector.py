@@ -0,0 +1,30 @@
+from experimental.anomaly_detector import detect_all_anomalies, detect_anomalies, load_tables
+from experimental.utils import load_env_dict
+
+
+def _env(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_load_env_dict(tmp_path):
+    path = _env(tmp_path, ".env", "# comment\n\nA = 1\nB=x=y\nnot a pair\n")
+    assert load_env_dict(path) == {"A": "1", "B": "x=y"}
+
+
+def test_shared_parsed_map_matches_standalone(tmp_path):
+    prod = _env(tmp_path, ".env.prod", "API_URL=https://api\nIS_LIVE=yes\nTOKEN=a8f3kq9z0x7c6v5b4n3m2\n")
+    dev = _env(tmp_path, ".env.dev", "API_URL=localhost\nIS_LIVE=false\nTOKEN=dev\n")
+    files = [prod, dev]
+
+    standalone = detect_all_anomalies(files)
+    # filled the way run_repo_scan fills it, before the anomaly checks run
+    parsed = {f: load_env_dict(f) for f in files}
+    assert detect_all_anomalies(files, parsed=parsed) == standalone
+    assert detect_anomalies(dev, files, parsed=parsed) == standalone[dev]
+
+    # files missing from the map are parsed once and added for later callers
+    shared = {}
+    load_tables(files, shared)
+    assert shared == parsed
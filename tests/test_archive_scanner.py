@@ -0,0 +1,67 @@
+import io
+import tarfile
+
+from experimental.archive_scanner import scan_archive
+
+SECRET = 'password = "hunter2hunter2"\n'
+
+
+def _tar(path, members):
+    with tarfile.open(path, "w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def test_member_that_only_looks_like_a_tarball_is_scanned_whole(tmp_path):
+    # starts with the bzip2 magic, so a nested tar is tried first
+    text = "BZh notes\n" + "x\n" * 2000 + SECRET
+    path = str(tmp_path / "image.tar")
+    _tar(path, {"app/notes.txt": text.encode()})
+
+    report = scan_archive(path)
+    assert report["skipped"] == []
+    assert any(f["line"] == 2002 for f in report["findings"])
+
+
+def test_corrupt_layer_is_skipped(tmp_path):
+    layer = io.BytesIO()
+    with tarfile.open(fileobj=layer, mode="w:gz") as tar:
+        for i in range(20):
+            data = bytes(range(256)) * 40 * (i + 1)
+            info = tarfile.TarInfo(f"bin/{i}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    broken = layer.getvalue()[: len(layer.getvalue()) // 2]
+    path = str(tmp_path / "image.tar")
+    _tar(path, {"broken.tar.gz": broken, "app/.env": SECRET.encode()})
+
+    report = scan_archive(path)
+    # members read before the damage are reported as usual
+    assert report["skipped"][-1] == f"{path}!broken.tar.gz"
+    assert report["env_files"] == [f"{path}!app/.env"]
+    assert report["findings"]
+
+
+def test_nested_layer(tmp_path):
+    layer = io.BytesIO()
+    with tarfile.open(fileobj=layer, mode="w:gz") as tar:
+        info = tarfile.TarInfo("app/.env")
+        info.size = len(SECRET)
+        tar.addfile(info, io.BytesIO(SECRET.encode()))
+    path = str(tmp_path / "image.tar")
+    _tar(path, {"layer.tar.gz": layer.getvalue()})
+
+    report = scan_archive(path)
+    assert report["env_files"] == [f"{path}!layer.tar.gz!app/.env"]
+    assert report["findings"]
+
+
+def test_unreadable_archive_is_skipped(tmp_path):
+    path = tmp_path / "not-an-archive.tar"
+    path.write_text(SECRET)
+    missing = str(tmp_path / "missing.tar")
+
+    assert scan_archive(str(path)) == {"env_files": [], "findings": [], "skipped": [str(path)]}
+    assert scan_archive(missing)["skipped"] == [missing]
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+import experimental.cache as cache_module
+from experimental.cache import ResultCache
+
+ISSUES = [{"type": "missing", "key": "A"}]
+
+
+def _write(path, text, age=60.0):
+    # written "age" seconds ago, so the stat is outside RACY_WINDOW
+    path.write_text(text)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+@pytest.fixture
+def files(tmp_path):
+    env = _write(tmp_path / ".env", "A=1\n")
+    schema = _write(tmp_path / "schema.json", '{"required": ["A"]}')
+    return env, schema
+
+
+def _cache(tmp_path, **limits):
+    return ResultCache(str(tmp_path / "cache.sqlite"), **limits)
+
+
+def test_hit_after_set(tmp_path, files):
+    env, schema = files
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema) == (None, None)
+        cache.set(env, schema, ISSUES, {"checked": 1})
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema) == (ISSUES, {"checked": 1})
+
+
+def test_schema_edit_invalidates(tmp_path, files):
+    env, schema = files
+    with _cache(tmp_path) as cache:
+        cache.set(env, schema, ISSUES)
+    _write(tmp_path / "schema.json", '{"required": ["A", "B"]}', age=30.0)
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema) == (None, None)
+
+
+def test_touch_without_edit_still_hits(tmp_path, files):
+    env, schema = files
+    with _cache(tmp_path) as cache:
+        cache.set(env, schema, ISSUES)
+    _write(tmp_path / "schema.json", '{"required": ["A"]}', age=30.0)
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema)[0] == ISSUES
+
+
+def test_tool_version_change_invalidates(tmp_path, files, monkeypatch):
+    env, schema = files
+    with _cache(tmp_path) as cache:
+        cache.set(env, schema, ISSUES)
+    monkeypatch.setattr(cache_module, "TOOL_VERSION", cache_module.TOOL_VERSION + ".next")
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema) == (None, None)
+
+
+def test_evicts_least_recently_used_over_max_entries(tmp_path, files):
+    env, _ = files
+    schemas = [_write(tmp_path / f"s{i}.json", str(i)) for i in range(3)]
+    with _cache(tmp_path, max_entries=2) as cache:
+        for s in schemas:
+            cache.set(env, s, ISSUES)
+        assert cache.stats()["entries"] == 2
+        assert cache.get(env, schemas[0]) == (None, None)
+        assert cache.get(env, schemas[1])[0] == ISSUES
+        assert cache.get(env, schemas[2])[0] == ISSUES
+
+
+def test_evicts_over_max_bytes(tmp_path, files):
+    env, _ = files
+    schemas = [_write(tmp_path / f"s{i}.json", str(i)) for i in range(3)]
+    with _cache(tmp_path) as cache:
+        cache.set(env, schemas[0], ISSUES)
+        entry_size = cache.stats()["bytes"]
+    with _cache(tmp_path, max_bytes=2 * entry_size) as cache:
+        cache.set(env, schemas[1], ISSUES)
+        cache.set(env, schemas[2], ISSUES)
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] <= 2 * entry_size
+        assert cache.get(env, schemas[0]) == (None, None)
+        assert cache.get(env, schemas[2])[0] == ISSUES
+
+
+def test_warm_get_does_not_hash(tmp_path, files, monkeypatch):
+    env, schema = files
+    with _cache(tmp_path) as cache:
+        cache.set(env, schema, ISSUES)
+
+    hashed = []
+    real_hash = cache_module.file_hash
+
+    def counting_hash(path):
+        hashed.append(path)
+        return real_hash(path)
+
+    monkeypatch.setattr(cache_module, "file_hash", counting_hash)
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema)[0] == ISSUES
+        assert hashed == []
+        # a touched file is hashed once, and its new stat is recorded
+        _write(tmp_path / ".env", "A=1\n", age=30.0)
+        assert cache.get(env, schema)[0] == ISSUES
+        assert hashed == [env]
+    with _cache(tmp_path) as cache:
+        assert cache.get(env, schema)[0] == ISSUES
+        assert hashed == [env]
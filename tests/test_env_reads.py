@@ -0,0 +1,27 @@
+from experimental.env_reads import extract_env_reads, find_unschema_reads
+
+GO_SOURCE = '''package main
+
+// os.Getenv("LINE_COMMENT")
+/*
+ * os.Getenv("BLOCK_COMMENT")
+ */
+func load(p *string) {
+	*p = os.Getenv("POINTER_TARGET")
+	v := os.Getenv("DECLARED") /* os.Getenv("TRAILING_COMMENT") */
+	_ = v
+}
+'''
+
+
+def test_comments_and_pointer_deref():
+    assert extract_env_reads(GO_SOURCE, "go") == [("POINTER_TARGET", 8), ("DECLARED", 9)]
+    js = "/* process.env.OPEN\n * process.env.STILL_OPEN */\n*x = process.env.READ\n"
+    assert extract_env_reads(js, "js") == [("READ", 3)]
+
+
+def test_find_unschema_reads_reports_pointer_deref(tmp_path):
+    path = tmp_path / "main.go"
+    path.write_text(GO_SOURCE)
+    issues = find_unschema_reads([str(path)], {"DECLARED": {}}, cache_path=None)
+    assert [i["key"] for i in issues] == ["POINTER_TARGET"]
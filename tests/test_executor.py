@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from env_check.executor import TaskExecutor, is_critical
+from env_check.severity import Severity
+from env_check.validator import ValidationResult, ValidatorEngine
+
+
+def _slow_square(x):
+    # later items finish first, so ordering is not an accident of timing
+    time.sleep(0.01 * (5 - x))
+    return x * x
+
+
+def test_thread_results_in_input_order():
+    executor = TaskExecutor("thread", max_workers=5)
+    assert list(executor.map(_slow_square, range(5))) == [0, 1, 4, 9, 16]
+
+
+def test_inline_and_chunked_modes_agree():
+    items = list(range(100))
+    inline = list(TaskExecutor("inline").map(str, items))
+    chunked = list(TaskExecutor("thread", max_workers=3, chunksize=7).map(str, items))
+    assert inline == chunked == [str(i) for i in items]
+
+
+def test_process_mode():
+    with TaskExecutor("process", max_workers=2, chunksize=10) as executor:
+        assert list(executor.map(abs, range(-50, 0))) == list(range(50, 0, -1))
+
+
+def test_in_flight_is_bounded():
+    pulled = []
+
+    def items():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    results = TaskExecutor("thread", max_workers=2, chunksize=4, max_in_flight=2).map(str, items())
+    assert next(results) == "0"
+    # two chunks of four submitted; nothing beyond was read from the input
+    assert len(pulled) <= 8 + 1
+    results.close()
+
+
+def test_interleaved_and_nested_maps():
+    executor = TaskExecutor("thread", max_workers=2)
+    first = executor.map(str, range(6))
+    second = executor.map(abs, range(-3, 0))
+    assert next(first) == "0"
+    # second finishes (and shuts its pool down) while first is still running
+    assert list(second) == [3, 2, 1]
+    assert list(first) == ["1", "2", "3", "4", "5"]
+
+    nested = [list(executor.map(abs, range(-i, 0))) for i in executor.map(int, "123")]
+    assert nested == [[1], [2, 1], [3, 2, 1]]
+
+
+def test_fail_fast_stops_at_first_critical():
+    calls = []
+
+    def check(i):
+        calls.append(i)
+        severity = Severity.CRITICAL if i == 3 else Severity.INFO
+        return ValidationResult(f"V{i}", i != 3, severity, "")
+
+    executor = TaskExecutor("inline", fail_fast=is_critical)
+    results = list(executor.map(check, range(10)))
+    assert [r.variable for r in results] == ["V0", "V1", "V2", "V3"]
+    assert calls == [0, 1, 2, 3]
+
+
+def test_is_critical():
+    assert is_critical({"severity": "critical"})
+    assert is_critical([{"severity": "warning"}, {"severity": "CRITICAL"}])
+    assert not is_critical({"severity": "error"})
+    assert not is_critical(ValidationResult("A", True, Severity.CRITICAL, ""))
+    assert not is_critical(None)
+
+
+def test_task_exception_is_raised():
+    def boom(i):
+        if i == 2:
+            raise ValueError("bad item")
+        return i
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(TaskExecutor("thread", max_workers=2).map(boom, range(5)))
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        TaskExecutor("fiber")
+
+
+def test_validator_engine_on_executor():
+    cfg = {
+        "A": {"required": True},
+        "B": {"type": "int"},
+        "C": {"required": True},
+    }
+    env = {"B": "12"}
+    plain = [r.to_dict() for r in ValidatorEngine(cfg, env=env).run()]
+    threaded = ValidatorEngine(cfg, env=env).run(TaskExecutor("thread", max_workers=3))
+    assert [r.to_dict() for r in threaded] == plain
+
+    stopped = ValidatorEngine(cfg, env=env).run(TaskExecutor("inline", fail_fast=is_critical))
+    assert [r.variable for r in stopped] == ["A"]
+
+
+def test_experimental_callers_import_and_run():
+    import importlib
+
+    for name in ("parallel_runner", "repo_usage_checker", "usage_index", "env_reads"):
+        importlib.import_module(f"experimental.{name}")
+    from experimental.parallel_runner import run_tasks_in_parallel
+    from experimental.schema_validator import SchemaValidator
+
+    assert run_tasks_in_parallel([lambda: [1], lambda: None, lambda: [2]]) == [1, 2]
+    failed = run_tasks_in_parallel([lambda: 1 / 0])
+    assert failed[0]["type"] == "internal_error"
+    assert SchemaValidator({}, {}).run_all_checks_parallel() == []
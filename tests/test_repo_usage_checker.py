@@ -0,0 +1,19 @@
+from experimental.repo_usage_checker import find_env_usage
+from experimental.usage_index import UsageIndex
+
+
+def test_binary_looking_files_are_searched(tmp_path):
+    # a NUL in the first 2 KB, or a leading 0x1f, makes read_text skip a
+    # file; usage checks still search it, as they always have
+    (tmp_path / "nul.txt").write_bytes(b"\x00header\nAPI_KEY = 1\n")
+    (tmp_path / "gz.txt").write_bytes(b"\x1fDB_URL\n")
+    (tmp_path / "app.py").write_text("print('nothing here')\n")
+    keys = ["API_KEY", "DB_URL", "UNUSED"]
+
+    issues, usages = find_env_usage([str(tmp_path)], keys)
+    assert usages["API_KEY"] == [str(tmp_path / "nul.txt")]
+    assert usages["DB_URL"] == [str(tmp_path / "gz.txt")]
+    assert [i["key"] for i in issues] == ["UNUSED"]
+
+    with UsageIndex(str(tmp_path / "index" / "usage.sqlite")) as index:
+        assert find_env_usage([str(tmp_path / "*.txt")], keys, index=index) == (issues, usages)
@@ -0,0 +1,66 @@
+import os
+import subprocess
+
+import pytest
+
+from experimental.repo_usage_checker import find_env_usage
+from experimental.walker import RepoTree
+
+
+def _write(root, rel, text=""):
+    path = os.path.join(root, *rel.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = str(tmp_path)
+    _write(root, ".gitignore", "build/\nsecrets/\n")
+    _write(root, ".env", "A=1\n")
+    _write(root, "secrets/.env.prod", "B=2\n")
+    _write(root, "build/out.py", "print(os.environ['B'])\n")
+    _write(root, "src/app.py", "os.getenv('A')\n")
+    _write(root, "src/build/gen.py", "D = 1\n")
+    _write(root, "vendor/lib.py", "C = os.getenv('C')\n")
+    return root
+
+
+def test_env_files_inside_gitignored_dirs(repo):
+    tree = RepoTree(repo)
+    assert not any(p.endswith(".env.prod") for p in tree.paths)
+    # ignored directories are only walked on request
+    assert [os.path.relpath(p, repo) for p in tree.env_files()] == [".env"]
+    assert sorted(os.path.relpath(p, repo) for p in tree.env_files(include_ignored=True)) == [
+        ".env", os.path.join("secrets", ".env.prod"),
+    ]
+
+    excluded = RepoTree(repo, {"exclude_dirs": ["secrets"]})
+    assert [os.path.relpath(p, repo) for p in excluded.env_files(include_ignored=True)] == [".env"]
+
+
+def test_env_files_from_git_listing(repo):
+    if subprocess.run(["git", "init", "-q", repo], capture_output=True).returncode:
+        pytest.skip("git not available")
+    tree = RepoTree(repo, use_git=True)
+    assert tree.source == "git"
+    assert sorted(os.path.relpath(p, repo) for p in tree.env_files(include_ignored=True)) == [
+        ".env", os.path.join("secrets", ".env.prod"),
+    ]
+
+
+def test_find_env_usage_same_with_and_without_tree(repo):
+    # a work tree, so the root .gitignore also applies when src/ is walked alone
+    os.mkdir(os.path.join(repo, ".git"))
+    keys = ["A", "B", "C", "D"]
+    trees = (RepoTree(repo), RepoTree(repo, {"exclude_dirs": ["vendor"]}), RepoTree(repo, gitignore=False))
+    for roots in ([repo], [os.path.join(repo, "src")], [repo, os.path.join(repo, "vendor")]):
+        plain = find_env_usage(roots, keys)
+        for tree in trees:
+            assert find_env_usage(roots, keys, tree=tree) == plain
+    issues, usages = find_env_usage([repo], keys)
+    # gitignored directories (build/, secrets/, src/build/) are pruned
+    assert [i["key"] for i in issues] == ["B", "D"]
+    assert usages["C"] == [os.path.join(repo, "vendor", "lib.py")]